@@ -1,3 +1,46 @@
 from django.contrib import admin
 
-# Register your models here.
+from . import llm_store
+from .models import LLMResponse
+
+
+@admin.register(LLMResponse)
+class LLMResponseAdmin(admin.ModelAdmin):
+    list_display = ('short_key', 'model_name', 'hit_count', 'response_size', 'created_at', 'last_accessed')
+    list_filter = ('model_name',)
+    readonly_fields = ('key', 'model_name', 'response_text', 'hit_count', 'created_at', 'last_accessed')
+    actions = ['purge_expired', 'purge_all']
+
+    @admin.display(description='Key')
+    def short_key(self, obj):
+        return obj.key[:12]
+
+    @admin.display(description='Size (chars)')
+    def response_size(self, obj):
+        return len(obj.response_text)
+
+    def has_add_permission(self, request):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        counters = llm_store.stats()
+        lookups = counters['hits'] + counters['misses']
+        ratio = f"{counters['hits'] / lookups:.0%}" if lookups else "n/a"
+        extra_context = {
+            **(extra_context or {}),
+            'subtitle': (
+                f"This process: {counters['hits']} hits, {counters['misses']} misses "
+                f"(hit ratio {ratio}), {counters['evictions']} evictions"
+            ),
+        }
+        return super().changelist_view(request, extra_context)
+
+    @admin.action(description="Evict expired and least recently used entries")
+    def purge_expired(self, request, queryset):
+        removed = llm_store.evict()
+        self.message_user(request, f"Evicted {removed} stored response(s).")
+
+    @admin.action(description="Purge the whole response store")
+    def purge_all(self, request, queryset):
+        removed = llm_store.purge()
+        self.message_user(request, f"Purged {removed} stored response(s).")
@@ -0,0 +1,63 @@
+# core/benchmarks.py
+"""Shared helpers for the bench_* management commands."""
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import override_settings
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+@contextmanager
+def scratch_database(on_disk=False):
+    """
+    Run against a throwaway, fully migrated database -- the same thing the
+    test runner does -- so benchmarks never touch real data. SQLite uses an
+    in-memory database unless on_disk is set. The shared cache is swapped
+    for an empty one too, so entries for scratch rows never reach the
+    cache the running site uses.
+    """
+    old_name = connection.settings_dict['NAME']
+    path = None
+    if on_disk and connection.vendor == 'sqlite':
+        fd, path = tempfile.mkstemp(suffix='.sqlite3', prefix='bench_')
+        os.close(fd)
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = path
+
+    cache_dir = tempfile.mkdtemp(prefix='bench_cache_')
+    scratch_cache = override_settings(
+        CACHES={'default': {'BACKEND': FILE_CACHE, 'LOCATION': cache_dir}}
+    )
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    scratch_cache.enable()
+    try:
+        yield
+    finally:
+        scratch_cache.disable()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if path:
+            connection.settings_dict['TEST'].pop('NAME', None)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class Timer:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
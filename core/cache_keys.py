@@ -0,0 +1,130 @@
+# core/cache_keys.py
+"""
+Canonical cache keys for LLM-backed lookups.
+
+User input is case-folded, trimmed and mapped through place/crop synonym
+tables before hashing, so "Guntur", "guntur " and "Guntur, AP" share one
+entry. Keys are ``<family>:<digest>`` -- bounded length, no spaces -- and
+lookups are counted per family so the hit ratio can be reported.
+"""
+import hashlib
+import re
+import threading
+
+# Common alternative spellings / old names for places farmers type in
+PLACE_ALIASES = {
+    'vizag': 'visakhapatnam',
+    'vishakhapatnam': 'visakhapatnam',
+    'bombay': 'mumbai',
+    'madras': 'chennai',
+    'calcutta': 'kolkata',
+    'bangalore': 'bengaluru',
+    'mysore': 'mysuru',
+    'poona': 'pune',
+    'baroda': 'vadodara',
+    'gurgaon': 'gurugram',
+    'trivandrum': 'thiruvananthapuram',
+    'cochin': 'kochi',
+    'rajahmundry': 'rajamahendravaram',
+}
+
+# Regional and alternative crop names mapped to the name used in templates
+CROP_SYNONYMS = {
+    'paddy': 'rice',
+    'dhan': 'rice',
+    'chawal': 'rice',
+    'maize': 'corn',
+    'makka': 'corn',
+    'makki': 'corn',
+    'gehun': 'wheat',
+    'gehu': 'wheat',
+    'groundnut': 'peanut',
+    'moongphali': 'peanut',
+    'arhar': 'pigeon pea',
+    'tur': 'pigeon pea',
+    'toor': 'pigeon pea',
+    'redgram': 'pigeon pea',
+    'red gram': 'pigeon pea',
+    'chana': 'chickpea',
+    'bengal gram': 'chickpea',
+    'gram': 'chickpea',
+    'bajra': 'pearl millet',
+    'jowar': 'sorghum',
+    'ragi': 'finger millet',
+    'kapas': 'cotton',
+    'ganna': 'sugarcane',
+    'aam': 'mango',
+    'tamatar': 'tomato',
+    'aloo': 'potato',
+}
+
+_PLACE_SUFFIX = re.compile(r'\s+(district|dist\.?|mandal|taluk|tehsil|city)$')
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def normalize_text(value):
+    """Case-fold and collapse whitespace"""
+    return ' '.join(str(value).casefold().split())
+
+
+def normalize_place(location):
+    """'Guntur, AP' / ' guntur district' -> 'guntur'"""
+    place = normalize_text(str(location).split(',')[0])
+    place = _PLACE_SUFFIX.sub('', place)
+    return PLACE_ALIASES.get(place, place)
+
+
+def normalize_crop(crop_name):
+    crop = normalize_text(str(crop_name).replace('-', ' '))
+    return CROP_SYNONYMS.get(crop, crop)
+
+
+def make_key(family, *parts):
+    canonical = '|'.join(normalize_text(part) for part in parts)
+    digest = hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:24]
+    return f"{family}:{digest}"
+
+
+def crop_recommendation_key(location, soil_type):
+    return make_key('crop_rec', normalize_place(location), soil_type)
+
+
+def farm_recommendation_key(location, soil_type, previous_crop, total_area):
+    """Key of a farm's recommendation report: every farm detail its prompt uses"""
+    return make_key(
+        'recommendation', normalize_place(location), soil_type, normalize_crop(previous_crop), float(total_area)
+    )
+
+
+def crop_plan_key(crop_name, soil_type, planting_date):
+    return make_key('crop_plan', normalize_crop(crop_name), soil_type, planting_date)
+
+
+def pesticide_key(crop_name, growth_stage):
+    return make_key('pesticide_rec', normalize_crop(crop_name), growth_stage)
+
+
+def key_family(cache_key):
+    return cache_key.split(':', 1)[0]
+
+
+def record_lookup(cache_key, hit):
+    family = key_family(cache_key)
+    with _stats_lock:
+        counts = _stats.setdefault(family, {'hits': 0, 'misses': 0})
+        counts['hits' if hit else 'misses'] += 1
+
+
+def hit_ratios():
+    """Per key family: hits, misses and hit ratio for this process"""
+    with _stats_lock:
+        report = {}
+        for family, counts in _stats.items():
+            lookups = counts['hits'] + counts['misses']
+            report[family] = {
+                **counts,
+                'hit_ratio': round(counts['hits'] / lookups, 4) if lookups else None,
+            }
+        return report
@@ -0,0 +1,79 @@
+# core/dashboard.py
+"""
+Per-farm caching for the monitoring dashboard.
+
+Everything cached for a farm lives under a version number. Saving or
+deleting a crop plan, monitoring task or pest alert bumps the farm's
+version (see core/signals.py), so stale entries are never read again and
+simply expire. Versions and cached farm ids live in the shared cache
+(settings.CACHES), so a save in the job worker or another web process
+invalidates every process's entries.
+"""
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Farm
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(farm_id):
+    return f"dashboard_version:{farm_id}"
+
+
+def _farm_key(user_id):
+    return f"dashboard_farm:{user_id}"
+
+
+def get_version(farm_id):
+    version = cache.get(_version_key(farm_id))
+    if version is None:
+        # Start from the clock rather than 1 so a lost version key can
+        # never collide with entries cached under an earlier version
+        cache.add(_version_key(farm_id), time.time_ns(), None)
+        version = cache.get(_version_key(farm_id))
+    return version
+
+
+def bump_version(farm_id):
+    try:
+        cache.incr(_version_key(farm_id))
+    except ValueError:
+        cache.add(_version_key(farm_id), time.time_ns(), None)
+
+
+def invalidate(farm_id):
+    """Bump the farm's version once the current transaction commits"""
+    transaction.on_commit(partial(bump_version, farm_id))
+
+
+def data_key(farm_id, version, name, *parts):
+    return ':'.join(['dashboard', str(farm_id), str(version), name, *map(str, parts)])
+
+
+def get_or_set(farm_id, version, name, compute, *parts):
+    key = data_key(farm_id, version, name, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, DASHBOARD_CACHE_TIMEOUT)
+    return value
+
+
+def get_farm_id(user):
+    """Id of the user's latest farm, or None"""
+    farm_id = cache.get(_farm_key(user.pk))
+    if farm_id is None:
+        farm_id = Farm.objects.filter(user=user).order_by('-created_at').values_list(
+            'id', flat=True
+        ).first()
+        if farm_id is not None:
+            cache.set(_farm_key(user.pk), farm_id, DASHBOARD_CACHE_TIMEOUT)
+    return farm_id
+
+
+def forget_farm(user_id):
+    cache.delete(_farm_key(user_id))
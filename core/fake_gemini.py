@@ -0,0 +1,120 @@
+# core/fake_gemini.py
+"""
+A local stand-in for the Gemini model, for load tests and benchmarks.
+
+FakeGeminiModel has the parts of genai.GenerativeModel this app calls --
+generate_content and generate_content_async, streaming included. It
+answers after a configurable latency with jitter and fails a configurable
+share of calls. Structured calls get a reply matching the requested
+schema and plain prompts get a short report. installed() swaps it in for
+core.utils.get_gemini_model without importing google.generativeai.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+TEXT_REPLY = (
+    "Recommended crops for your farm:\n\n"
+    "1. Rice -- suits the soil and the coming monsoon; keep fields flooded "
+    "for the first month.\n\n"
+    "2. Green gram -- short duration, fixes nitrogen after the previous crop.\n\n"
+    "3. Groundnut -- good market price; needs well drained beds.\n\n"
+    "Water: plan irrigation around the rainfall forecast and avoid "
+    "waterlogging during flowering."
+)
+
+
+class FakeGeminiError(Exception):
+    """A simulated API failure"""
+
+
+def sample(schema, items=3):
+    """A value matching schema, with `items` entries in every list"""
+    kind = schema['type']
+    if kind == 'object':
+        return {name: sample(subschema, items) for name, subschema in schema['properties'].items()}
+    if kind == 'array':
+        return [sample(schema['items'], items) for _ in range(max(items, schema.get('min_items', 0)))]
+    if 'enum' in schema:
+        return schema['enum'][0]
+    if kind in ('integer', 'number'):
+        return 30
+    if kind == 'boolean':
+        return True
+    return "Sample answer from the local fake model"
+
+
+def generation_config(**options):
+    """Stand-in for llm_client.generation_config"""
+    return SimpleNamespace(**options)
+
+
+class FakeGeminiModel:
+    def __init__(self, latency=0.5, jitter=0.2, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def _draw(self):
+        """Delay of the next call and whether it fails"""
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.failure_rate
+            self.failures += failed
+        return delay, failed
+
+    def _reply(self, prompt, generation_config):
+        schema = getattr(generation_config, 'response_schema', None)
+        text = json.dumps(sample(schema)) if schema else TEXT_REPLY
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        delay, failed = self._draw()
+        time.sleep(delay)
+        if failed:
+            raise FakeGeminiError("Simulated Gemini failure")
+        return self._reply(prompt, generation_config)
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False, **kwargs):
+        delay, failed = self._draw()
+        reply = self._reply(prompt, generation_config)
+        if stream:
+            # Time to first chunk is about half the latency, the rest is spread over the chunks
+            await asyncio.sleep(delay / 2)
+            if failed:
+                raise FakeGeminiError("Simulated Gemini failure")
+            return self._stream(reply, delay / 2)
+        await asyncio.sleep(delay)
+        if failed:
+            raise FakeGeminiError("Simulated Gemini failure")
+        return reply
+
+    async def _stream(self, reply, delay):
+        chunks = reply.text.split('\n\n')
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(delay / len(chunks))
+            last = i == len(chunks) - 1
+            yield SimpleNamespace(
+                text=chunk if last else chunk + '\n\n',
+                usage_metadata=reply.usage_metadata if last else None,
+            )
+
+
+@contextmanager
+def installed(model):
+    """Answer every Gemini call made through core.utils with model"""
+    with mock.patch('core.utils.get_gemini_model', return_value=model), \
+            mock.patch('core.llm_client.generation_config', generation_config):
+        yield model
@@ -0,0 +1,134 @@
+# core/jobs.py
+"""
+DB-backed queue for LLM generation work.
+
+Views enqueue a GenerationJob and return immediately; one or more
+``manage.py run_generation_worker`` processes claim pending jobs and run
+the (slow) generators off the request path.
+"""
+from datetime import date, timedelta
+
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import CropPlan, Farm, GenerationJob
+from .monitoring import save_plan_with_schedule
+from .recommendations import save_recommendation
+from .utils import (
+    apply_daily_plan,
+    generate_crop_plan,
+    generate_recommendation_text,
+    get_pesticide_recommendations,
+)
+
+MAX_ATTEMPTS = 3
+
+
+def run_crop_plan_job(job):
+    farm = Farm.objects.get(id=job.payload['farm_id'])
+    crop_plan = CropPlan(
+        farm=farm,
+        crop_name=job.payload['crop_name'],
+        planting_date=date.fromisoformat(job.payload['planting_date']),
+    )
+    daily_plan = generate_crop_plan(
+        crop_plan.crop_name,
+        job.payload['planting_date'],
+        farm.soil_type,
+        job.payload.get('mode')
+    )
+    apply_daily_plan(crop_plan, daily_plan)
+    save_plan_with_schedule(crop_plan)
+    return {'plan_id': crop_plan.id}
+
+
+def run_recommendation_job(job):
+    farm = Farm.objects.get(id=job.payload['farm_id'])
+    recommendation = save_recommendation(farm, generate_recommendation_text(farm, job.payload.get('mode')))
+    return {'recommendation_id': recommendation.id}
+
+
+def run_pesticides_job(job):
+    plan = CropPlan.objects.get(id=job.payload['plan_id'])
+    plan.pesticides = get_pesticide_recommendations(
+        plan.crop_name,
+        job.payload['growth_stage']
+    )
+    plan.save(update_fields=['pesticides_doc'])
+    return {'plan_id': plan.id}
+
+
+JOB_HANDLERS = {
+    'crop_plan': run_crop_plan_job,
+    'recommendation': run_recommendation_job,
+    'pesticides': run_pesticides_job,
+}
+
+
+def claim_next_job():
+    """Atomically move the oldest pending job to running; None if the queue is empty"""
+    while True:
+        job_id = (
+            GenerationJob.objects.filter(status='pending')
+            .order_by('created_at')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+
+        # Conditional UPDATE so two workers can never claim the same job
+        claimed = GenerationJob.objects.filter(id=job_id, status='pending').update(
+            status='running',
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return GenerationJob.objects.get(id=job_id)
+
+
+def run_job(job):
+    """Run a claimed job, recording its result or re-queueing it on failure"""
+    try:
+        job.result = JOB_HANDLERS[job.kind](job)
+        job.status = 'done'
+        job.error = ''
+    except Exception as e:
+        job.error = str(e)
+        job.status = 'pending' if job.attempts < MAX_ATTEMPTS else 'failed'
+
+    job.finished_at = timezone.now() if job.status in ('done', 'failed') else None
+    # Only while we still own the claim: a job that ran past --stale-after
+    # may have been re-queued and claimed by another worker since
+    GenerationJob.objects.filter(id=job.id, status='running', started_at=job.started_at).update(
+        result=job.result, status=job.status, error=job.error, finished_at=job.finished_at
+    )
+    return job
+
+
+def requeue_stale_jobs(stale_after):
+    """
+    Return jobs stuck in running (e.g. a killed worker) to the queue, or fail
+    them once they have used up MAX_ATTEMPTS, so a job that keeps crashing
+    its worker isn't retried forever. Returns (requeued, failed).
+    """
+    stale = GenerationJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - timedelta(seconds=stale_after)
+    )
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status='failed',
+        error=f"Gave up after {MAX_ATTEMPTS} attempts; the worker stopped responding",
+        finished_at=timezone.now(),
+    )
+    requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(status='pending')
+    return requeued, failed
+
+
+def job_result_url(job):
+    """Where the browser should go once the job has finished"""
+    if job.status != 'done':
+        return None
+    if job.kind == 'recommendation':
+        return reverse('core:view_recommendations')
+    return reverse('core:plan_detail', kwargs={'plan_id': job.result['plan_id']})
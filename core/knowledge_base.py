@@ -0,0 +1,181 @@
+# core/knowledge_base.py
+"""
+Agronomic knowledge base.
+
+Crop seasons and soil suitability, agro-climatic zones and default
+pesticide recommendations live in versioned JSON files under
+core/data/knowledge_base/. They are loaded and validated once per process
+into read-only, pre-indexed structures, so every lookup is a dict access
+and no table is rebuilt per request. To change the data, edit the files;
+bump a file's "version" only when its layout changes.
+"""
+import json
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+
+from .cache_keys import normalize_crop, normalize_place, normalize_text
+from .schemas import PESTICIDE_SCHEMA, SchemaError, validate
+
+KNOWLEDGE_BASE_DIR = Path(__file__).resolve().parent / 'data' / 'knowledge_base'
+
+# File layout version this module reads
+DATA_VERSION = 1
+
+Crop = namedtuple(
+    'Crop', 'name local_name family sowing_months season soils duration_days water zones market'
+)
+
+Pesticide = namedtuple('Pesticide', 'name type target application safety_precautions')
+
+KnowledgeBase = namedtuple(
+    'KnowledgeBase',
+    'versions crops soils zone_climates place_zones stages pesticides general_guidelines emergency_contacts'
+)
+
+WATER_NEEDS = ('low', 'medium', 'high')
+_PESTICIDE_ITEM_SCHEMA = PESTICIDE_SCHEMA['properties']['recommendations']['items']
+
+
+def _read(directory, name):
+    path = Path(directory) / name
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if data.get('version') != DATA_VERSION:
+        raise ValueError(f"{name}: unsupported version {data.get('version')!r}")
+    return data
+
+
+def _load_crops(data, zones):
+    crops = {}
+    for key, entry in data['crops'].items():
+        try:
+            crop = Crop(
+                name=entry['name'],
+                local_name=entry['local_name'],
+                family=entry['family'],
+                sowing_months=tuple(entry['sowing_months']),
+                season=entry['season'],
+                soils=tuple(normalize_text(soil) for soil in entry['soils']),
+                duration_days=entry['duration_days'],
+                water=entry['water'],
+                zones=tuple(entry['zones']),
+                market=entry['market'],
+            )
+        except KeyError as e:
+            raise ValueError(f"crops.json/{key}: missing {e}") from None
+        if not crop.sowing_months or not all(1 <= month <= 12 for month in crop.sowing_months):
+            raise ValueError(f"crops.json/{key}: sowing_months must be months 1-12")
+        if not isinstance(crop.duration_days, int) or crop.duration_days <= 12:
+            raise ValueError(f"crops.json/{key}: duration_days must be an integer above 12")
+        if crop.water not in WATER_NEEDS:
+            raise ValueError(f"crops.json/{key}: water must be one of {WATER_NEEDS}")
+        unknown = set(crop.zones) - set(zones)
+        if unknown:
+            raise ValueError(f"crops.json/{key}: unknown zones {sorted(unknown)}")
+        crops[normalize_crop(key)] = crop
+    return crops
+
+
+def _load_pesticides(data):
+    stages = tuple(data['stages'])
+    if 'initial' not in stages:
+        raise ValueError("pesticides.json: 'initial' must be one of the stages")
+    by_crop = {}
+    for crop, by_stage in data['crops'].items():
+        if 'initial' not in by_stage:
+            raise ValueError(f"pesticides.json/{crop}: an 'initial' stage is required")
+        resolved = {}
+        for stage in stages:
+            entries = by_stage.get(stage, by_stage['initial'])
+            for entry in entries:
+                try:
+                    validate(_PESTICIDE_ITEM_SCHEMA, entry, f"pesticides.json/{crop}/{stage}")
+                except SchemaError as e:
+                    raise ValueError(str(e)) from None
+            resolved[stage] = tuple(
+                Pesticide(
+                    name=entry['name'],
+                    type=entry['type'],
+                    target=entry['target'],
+                    application=entry['application'],
+                    safety_precautions=tuple(entry['safety_precautions']),
+                )
+                for entry in entries
+            )
+        by_crop[normalize_crop(crop)] = MappingProxyType(resolved)
+    if 'default' not in by_crop:
+        raise ValueError("pesticides.json: a 'default' crop is required")
+    return stages, by_crop
+
+
+def load(directory=KNOWLEDGE_BASE_DIR):
+    """Read and index the data files in directory"""
+    regions = _read(directory, 'regions.json')
+    crops_data = _read(directory, 'crops.json')
+    pesticides_data = _read(directory, 'pesticides.json')
+
+    zone_climates = {zone: entry['climate'] for zone, entry in regions['zones'].items()}
+    place_zones = {
+        normalize_text(place): zone
+        for zone, entry in regions['zones'].items()
+        for place in entry['places']
+    }
+    crops = _load_crops(crops_data, zone_climates)
+    stages, pesticides = _load_pesticides(pesticides_data)
+
+    return KnowledgeBase(
+        versions=MappingProxyType({
+            'regions': regions['version'],
+            'crops': crops_data['version'],
+            'pesticides': pesticides_data['version'],
+        }),
+        crops=MappingProxyType(crops),
+        soils=frozenset(soil for crop in crops.values() for soil in crop.soils),
+        zone_climates=MappingProxyType(zone_climates),
+        place_zones=MappingProxyType(place_zones),
+        stages=stages,
+        pesticides=MappingProxyType(pesticides),
+        general_guidelines=tuple(pesticides_data['general_guidelines']),
+        emergency_contacts=tuple(pesticides_data['emergency_contacts']),
+    )
+
+
+@lru_cache(maxsize=None)
+def get():
+    """The process-wide knowledge base, loaded on first use"""
+    return load()
+
+
+def crop(crop_name):
+    """Crop facts by any known name or synonym; None if the crop isn't in the data"""
+    return get().crops.get(normalize_crop(crop_name))
+
+
+def zone_for(location):
+    """Agro-climatic zone of a free-text location ("Guntur, AP"); None if unknown"""
+    place_zones = get().place_zones
+    zone = place_zones.get(normalize_place(location))
+    if zone is not None:
+        return zone
+    for part in str(location).split(',')[1:]:
+        zone = place_zones.get(normalize_text(part))
+        if zone is not None:
+            return zone
+    return None
+
+
+def pesticide_recommendations(crop_name, growth_stage):
+    """Default pesticide recommendations for a crop and growth stage, as plain dicts"""
+    kb = get()
+    by_stage = kb.pesticides.get(normalize_crop(crop_name), kb.pesticides['default'])
+    pesticides = by_stage.get(growth_stage, by_stage['initial'])
+    return {
+        'recommendations': [
+            {**pesticide._asdict(), 'safety_precautions': list(pesticide.safety_precautions)}
+            for pesticide in pesticides
+        ],
+        'general_guidelines': list(kb.general_guidelines),
+        'emergency_contacts': list(kb.emergency_contacts),
+    }
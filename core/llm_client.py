@@ -0,0 +1,39 @@
+# core/llm_client.py
+"""
+Lazy access to the Google Gemini client.
+
+Importing google.generativeai loads grpc, protobuf and the whole
+google.api_core stack, which takes most of a second. Nothing imports it at
+module level; the first call to genai() does, and configures the client
+once with GEMINI_API_KEY from the environment or .env. Web workers pay
+that cost at startup through core.startup.warm_up(), while management
+commands and test runs that never call Gemini don't pay it at all.
+"""
+import threading
+
+from decouple import config
+
+_lock = threading.Lock()
+_genai = None
+
+
+def genai():
+    """The configured google.generativeai module, imported on first use"""
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                import google.generativeai as module
+
+                module.configure(api_key=config('GEMINI_API_KEY'))
+                _genai = module
+    return _genai
+
+
+def get_model(model_name):
+    return genai().GenerativeModel(model_name)
+
+
+def generation_config(**options):
+    return genai().GenerationConfig(**options)
+
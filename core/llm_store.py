@@ -0,0 +1,136 @@
+# core/llm_store.py
+"""
+Persistent, content-addressed store for raw LLM responses.
+
+Entries are keyed by sha256(model name + normalized prompt) and live in the
+database, so they survive restarts and deploys, unlike the cache in front
+of them. The table is bounded by LLM_RESPONSE_STORE['MAX_ENTRIES']
+(least recently used entries are evicted first) and entries older than
+LLM_RESPONSE_STORE['TTL'] seconds are treated as misses and purged.
+"""
+import hashlib
+import json
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import LLMResponse
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+
+def _settings():
+    options = {'ENABLED': True, 'MAX_ENTRIES': 5000, 'TTL': 60 * 60 * 24 * 30, 'CULL_EVERY': 50}
+    options.update(getattr(settings, 'LLM_RESPONSE_STORE', {}))
+    return options
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def stats():
+    """Hit/miss/write/eviction counters for this process"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so re-indented prompts share an entry"""
+    return ' '.join(prompt.split())
+
+
+def make_key(model_name, prompt, params=None):
+    payload = json.dumps(
+        [model_name, normalize_prompt(prompt), params or {}],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _expiry_cutoff(options):
+    return timezone.now() - timedelta(seconds=options['TTL'])
+
+
+def get(model_name, prompt, params=None):
+    """Return the stored response text, or None on a miss"""
+    options = _settings()
+    if not options['ENABLED']:
+        return None
+
+    key = make_key(model_name, prompt, params)
+    entry = LLMResponse.objects.filter(
+        key=key, created_at__gte=_expiry_cutoff(options)
+    ).only('response_text').first()
+    if entry is None:
+        _count('misses')
+        return None
+
+    LLMResponse.objects.filter(key=key).update(
+        hit_count=F('hit_count') + 1, last_accessed=timezone.now()
+    )
+    _count('hits')
+    return entry.response_text
+
+
+def put(model_name, prompt, response_text, params=None):
+    options = _settings()
+    if not options['ENABLED']:
+        return
+
+    # Single-statement upsert, so concurrent writers never race a read.
+    # Rewriting an entry restarts its TTL, or a re-put expired entry would
+    # stay a miss until evicted.
+    now = timezone.now()
+    LLMResponse.objects.bulk_create(
+        [LLMResponse(
+            key=make_key(model_name, prompt, params),
+            model_name=model_name,
+            response_text=response_text,
+            created_at=now,
+            last_accessed=now,
+        )],
+        update_conflicts=True,
+        unique_fields=['key'],
+        update_fields=['model_name', 'response_text', 'created_at', 'last_accessed'],
+    )
+    _count('writes')
+
+    with _stats_lock:
+        cull = _stats['writes'] % options['CULL_EVERY'] == 0
+    if cull:
+        evict()
+
+
+def evict():
+    """Drop expired entries and the least recently used ones over MAX_ENTRIES"""
+    options = _settings()
+    removed, _ = LLMResponse.objects.filter(created_at__lt=_expiry_cutoff(options)).delete()
+
+    cutoff = (
+        LLMResponse.objects.order_by('-last_accessed')
+        .values_list('last_accessed', flat=True)[options['MAX_ENTRIES']:options['MAX_ENTRIES'] + 1]
+        .first()
+    )
+    if cutoff is not None:
+        over, _ = LLMResponse.objects.filter(last_accessed__lte=cutoff).delete()
+        removed += over
+
+    _count('evictions', removed)
+    return removed
+
+
+def purge():
+    removed, _ = LLMResponse.objects.all().delete()
+    _count('evictions', removed)
+    return removed
+
+
+aget = sync_to_async(get)
+aput = sync_to_async(put)
@@ -0,0 +1,170 @@
+# core/management/commands/bench_indexes.py
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.benchmarks import Timer, percentile, scratch_database
+from core.models import (
+    CropPlan, CropRecommendation, Farm, MonitoringRecurrence, MonitoringSchedule, PestAlert
+)
+
+# Models whose Meta.indexes back the monitoring dashboard and recommendation views
+INDEXED_MODELS = [CropPlan, CropRecommendation, MonitoringRecurrence, MonitoringSchedule, PestAlert]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch database with monitoring data and compare the query plans "
+        "and latency of the dashboard queries without and with the composite indexes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedules', type=int, default=1_000_000,
+                            help="MonitoringSchedule rows to seed")
+        parser.add_argument('--farms', type=int, default=2000)
+        parser.add_argument('--plans-per-farm', type=int, default=10)
+        parser.add_argument('--hot-farm-plans', type=int, default=2000,
+                            help="Plans of the measured farm (a large cooperative account)")
+        parser.add_argument('--repeat', type=int, default=50,
+                            help="Runs of each query per measurement")
+        parser.add_argument('--in-memory', action='store_true',
+                            help="Use an in-memory SQLite database instead of a temporary file")
+
+    def handle(self, *args, **options):
+        with scratch_database(on_disk=not options['in_memory']):
+            with Timer() as seeding:
+                farm = self.seed(options)
+            self.stdout.write(
+                f"Seeded {MonitoringSchedule.objects.count():,} schedules, "
+                f"{CropPlan.objects.count():,} plans, {PestAlert.objects.count():,} alerts, "
+                f"{CropRecommendation.objects.count():,} recommendations in {seeding.elapsed:.1f}s"
+            )
+
+            self.set_indexes(False)
+            before = self.measure(farm, options['repeat'])
+            self.set_indexes(True)
+            after = self.measure(farm, options['repeat'])
+
+        for name in before:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+            for label, results in (('before', before), ('after', after)):
+                plan, p50, p95 = results[name]
+                self.stdout.write(f"  {label}: p50 {p50 * 1000:.2f}ms, p95 {p95 * 1000:.2f}ms")
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+            speedup = before[name][1] / max(after[name][1], 1e-9)
+            self.stdout.write(self.style.SUCCESS(f"  {speedup:.1f}x faster at p50"))
+
+    def seed(self, options):
+        rng = random.Random(42)
+        today = date.today()
+        user = User.objects.create(username='bench')
+
+        Farm.objects.bulk_create(
+            Farm(user=user, location=f'Village {i}', total_area=5,
+                 soil_type=rng.choice(['clay', 'loam', 'sandy', 'silt']), previous_crop='rice')
+            for i in range(options['farms'])
+        )
+        farm_ids = list(Farm.objects.values_list('id', flat=True))
+
+        hot_farm_id = farm_ids[0]
+        plans = []
+        for farm_id in farm_ids:
+            count = options['hot_farm_plans'] if farm_id == hot_farm_id else options['plans_per_farm']
+            for i in range(count):
+                planting = today - timedelta(days=rng.randint(0, 720))
+                plans.append(CropPlan(
+                    farm_id=farm_id, crop_name=rng.choice(['wheat', 'rice', 'corn', 'cotton']),
+                    planting_date=planting, harvest_date=planting + timedelta(days=120),
+                    monitoring_frequency='weekly',
+                ))
+        CropPlan.objects.bulk_create(plans, batch_size=5000)
+        plans = list(CropPlan.objects.values_list('id', 'planting_date'))
+
+        # Spread schedules evenly over plans; past tasks are mostly completed
+        per_plan = max(1, options['schedules'] // len(plans))
+
+        def schedules():
+            for plan_id, planting in plans:
+                for offset in range(per_plan):
+                    day = planting + timedelta(days=offset * 120 // per_plan)
+                    yield MonitoringSchedule(
+                        crop_plan_id=plan_id, date=day, task_type='irrigation',
+                        description='Check soil moisture',
+                        completed=day < today and rng.random() < 0.95,
+                    )
+
+        self.bulk_insert(MonitoringSchedule, schedules())
+
+        self.bulk_insert(MonitoringRecurrence, (
+            MonitoringRecurrence(
+                crop_plan_id=plan_id, task_type=task_type, description='Recurring check',
+                start_date=planting, end_date=planting + timedelta(days=120), interval_days=interval,
+            )
+            for plan_id, planting in plans
+            for task_type, interval in (('irrigation', 3), ('pest_check', 7))
+        ))
+        self.bulk_insert(PestAlert, (
+            PestAlert(farm_id=farm_id, pest_name='Aphids', risk_level='low',
+                      description='', recommended_action='', resolved=rng.random() < 0.9)
+            for farm_id in farm_ids for _ in range(20)
+        ))
+        self.bulk_insert(CropRecommendation, (
+            CropRecommendation(farm_id=farm_id, climate_description='', soil_description='',
+                               previous_crop_impact='')
+            for farm_id in farm_ids for _ in range(10)
+        ))
+        return Farm.objects.get(id=hot_farm_id)
+
+    def bulk_insert(self, model, rows, batch_size=20000):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+
+    def set_indexes(self, enabled):
+        with connection.schema_editor() as schema_editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    if enabled:
+                        schema_editor.add_index(model, index)
+                    else:
+                        schema_editor.remove_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def queries(self, farm):
+        """The querysets monitoring_dashboard and view_recommendations run"""
+        today = date.today()
+        current_plans = CropPlan.objects.filter(farm=farm, harvest_date__gte=today)
+        return {
+            'current crop plans': current_plans,
+            'open schedules of current plans': MonitoringSchedule.objects.filter(
+                crop_plan__in=current_plans, completed=False, date__gte=today
+            ).order_by('date')[:10],
+            'active recurrences': MonitoringRecurrence.objects.filter(
+                crop_plan__in=current_plans, end_date__gte=today
+            ),
+            'unresolved pest alerts': PestAlert.objects.filter(farm=farm, resolved=False),
+            'latest recommendation': CropRecommendation.objects.filter(farm=farm).order_by('-created_at')[:1],
+        }
+
+    def measure(self, farm, repeat):
+        results = {}
+        for name, queryset in self.queries(farm).items():
+            timings = []
+            for _ in range(repeat):
+                with Timer() as timer:
+                    list(queryset.all())
+                timings.append(timer.elapsed)
+            results[name] = (queryset.explain(), percentile(timings, 50), percentile(timings, 95))
+        return results
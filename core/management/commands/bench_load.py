@@ -0,0 +1,293 @@
+# core/management/commands/bench_load.py
+import json
+import queue
+import random
+import subprocess
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import rules
+from core.benchmarks import percentile, scratch_database
+from core.fake_gemini import FakeGeminiModel, installed
+from core.jobs import claim_next_job, run_job
+from core.models import CropPlan, Farm, MonitoringSchedule
+from core.monitoring import save_plan_with_schedule
+from core.utils import apply_daily_plan, generate_default_plan
+
+# Share of each request kind in the traffic, and the status that counts as
+# success (form posts redirect)
+MIX = {
+    'farm_details': 20,
+    'crop_plan': 10,
+    'plan_detail': 30,
+    'monitoring_dashboard': 30,
+    'complete_task': 10,
+}
+EXPECTED_STATUS = {
+    'farm_details': 200,
+    'crop_plan': 302,
+    'plan_detail': 200,
+    'monitoring_dashboard': 200,
+    'complete_task': 302,
+}
+
+LOCATIONS = ['Guntur', 'Nellore', 'Kochi', 'Chennai', 'Visakhapatnam', 'Hubli']
+# Crops in the knowledge base can be answered by the rules; okra, turmeric
+# and dragon fruit always go to (fake) Gemini
+CROPS = ['rice', 'wheat', 'cotton', 'tomato', 'chickpea', 'okra', 'turmeric', 'dragon fruit']
+
+# A seeded farmer: the plans and one-off tasks requests pick from
+Account = namedtuple('Account', 'user plan_ids task_ids')
+
+
+def concurrency_levels(value):
+    levels = sorted({int(level) for level in value.split(',')})
+    if not levels or levels[0] < 1:
+        raise ValueError(value)
+    return levels
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the main pages on a seeded scratch database with a local fake "
+        "Gemini model: a mix of farm_details, crop_plan, plan_detail, "
+        "monitoring_dashboard and complete_task requests at increasing "
+        "concurrency. Writes requests per second, p50/p95/p99 latency and error "
+        "rates to a JSON file that can be compared across commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=concurrency_levels, default=[1, 4, 16],
+                            help="Comma-separated concurrency levels (default: 1,4,16)")
+        parser.add_argument('--requests', type=int, default=300, help="Requests per concurrency level")
+        parser.add_argument('--warmup', type=int, default=20,
+                            help="Unrecorded requests sent before the first level")
+        parser.add_argument('--users', type=int, default=50, help="Seeded farmers")
+        parser.add_argument('--plans-per-user', type=int, default=3)
+        parser.add_argument('--tasks-per-plan', type=int, default=5, help="One-off monitoring tasks per plan")
+        parser.add_argument('--latency', type=float, default=0.5, help="Fake Gemini latency, seconds")
+        parser.add_argument('--jitter', type=float, default=0.2, help="Fake Gemini latency jitter (+/-), seconds")
+        parser.add_argument('--failure-rate', type=float, default=0.05,
+                            help="Share of fake Gemini calls that fail")
+        parser.add_argument('--mode', choices=rules.MODES, default=None,
+                            help="Generation mode sent with crop plans (default: settings.GENERATION_MODE)")
+        parser.add_argument('--job-queue', action='store_true',
+                            help="Queue crop plans as jobs, run by a worker thread during each level, "
+                                 "instead of generating them in the request")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='bench_load.json', help="Where to write the JSON report")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['users'] < 1 or options['plans_per_user'] < 1:
+            raise CommandError("--requests, --users and --plans-per-user must be at least 1")
+        if options['tasks_per_plan'] < 1:
+            raise CommandError("--tasks-per-plan must be at least 1")
+        self.options = options
+        model = FakeGeminiModel(options['latency'], options['jitter'], options['failure_rate'], options['seed'])
+        overrides = {
+            # Production-like: no query log, no slow request lines in the output
+            'DEBUG': False,
+            'ALLOWED_HOSTS': ['testserver'],
+            'SLOW_REQUEST_LOG_MS': None,
+            # A handful of farmers send all the traffic; the per-user limits
+            # would count the app's own 429s as errors
+            'RATE_LIMITS': [],
+            'GENERATION_USE_JOB_QUEUE': options['job_queue'],
+        }
+
+        # On disk: an in-memory SQLite database can't take writes from many threads
+        with scratch_database(on_disk=True), override_settings(**overrides), installed(model):
+            cache.clear()
+            started = time.perf_counter()
+            self.accounts = self.seed()
+            self.stdout.write(
+                f"seeded {len(self.accounts)} farmers, {CropPlan.objects.count()} plans "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            if options['warmup']:
+                self.run_level(1, options['warmup'], model)
+
+            self.stdout.write(f"{'conc':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            levels = []
+            for concurrency in options['concurrency']:
+                level = self.run_level(concurrency, options['requests'], model)
+                levels.append(level)
+                self.stdout.write(
+                    f"{concurrency:5} {level['rps']:8.1f} {level['p50_ms']:8.1f} {level['p95_ms']:8.1f} "
+                    f"{level['p99_ms']:8.1f} {level['error_rate']:7.2%}"
+                )
+
+        report = {
+            'commit': self.commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'config': {
+                name: options[name] for name in (
+                    'requests', 'warmup', 'users', 'plans_per_user', 'tasks_per_plan', 'latency',
+                    'jitter', 'failure_rate', 'mode', 'job_queue', 'seed',
+                )
+            },
+            'mix': MIX,
+            'levels': levels,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"wrote {options['output']}"))
+
+    def seed(self):
+        """Farmers with a farm, crop plans and one-off tasks; no Gemini calls"""
+        rng = random.Random(self.options['seed'])
+        today = date.today()
+        soils = [soil for soil, _ in Farm.SOIL_CHOICES]
+        accounts = []
+        for i in range(self.options['users']):
+            user = User.objects.create(username=f'bench{i}')
+            farm = Farm.objects.create(
+                user=user, location=LOCATIONS[i % len(LOCATIONS)], total_area=rng.randint(1, 20),
+                soil_type=soils[i % len(soils)], previous_crop=rng.choice(CROPS),
+            )
+            plan_ids = []
+            for j in range(self.options['plans_per_user']):
+                crop = CROPS[(i + j) % len(CROPS)]
+                plan = CropPlan(farm=farm, crop_name=crop, planting_date=today - timedelta(days=rng.randint(0, 60)))
+                apply_daily_plan(plan, generate_default_plan(
+                    crop, plan.planting_date.strftime('%Y-%m-%d'), farm.soil_type
+                ))
+                save_plan_with_schedule(plan)
+                plan_ids.append(plan.id)
+            tasks = MonitoringSchedule.objects.bulk_create([
+                MonitoringSchedule(
+                    crop_plan_id=plan_id, date=today + timedelta(days=day),
+                    task_type='pest_check', description="Check leaves for pests",
+                )
+                for plan_id in plan_ids
+                for day in range(self.options['tasks_per_plan'])
+            ])
+            accounts.append(Account(user, plan_ids, [task.id for task in tasks]))
+        return accounts
+
+    def run_level(self, concurrency, requests, model):
+        rng = random.Random(self.options['seed'] * 1000 + concurrency)
+        kinds = queue.SimpleQueue()
+        for kind in rng.choices(list(MIX), weights=list(MIX.values()), k=requests):
+            kinds.put(kind)
+        results = []
+        calls, failures = model.calls, model.failures
+        if self.options['job_queue']:
+            done = threading.Event()
+            jobs = []
+            job_worker = threading.Thread(target=self.run_jobs, args=(done, jobs))
+            job_worker.start()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            workers = [pool.submit(self.worker, worker, kinds, results) for worker in range(concurrency)]
+            for worker in workers:
+                worker.result()
+        elapsed = time.perf_counter() - started
+        if self.options['job_queue']:
+            # Gemini calls of the level's jobs count towards the level
+            done.set()
+            job_worker.join()
+
+        return {
+            'concurrency': concurrency,
+            'duration_s': round(elapsed, 3),
+            'rps': round(len(results) / elapsed, 2),
+            **self.summarize(results),
+            'endpoints': {
+                kind: self.summarize([row for row in results if row[0] == kind]) for kind in MIX
+            },
+            'statuses': {
+                str(status): count for status, count in sorted(Counter(row[2] for row in results).items(), key=str)
+            },
+            'gemini_calls': model.calls - calls,
+            'gemini_failures': model.failures - failures,
+            **({'jobs': dict(Counter(jobs))} if self.options['job_queue'] else {}),
+        }
+
+    def run_jobs(self, done, statuses):
+        """A generation worker: run queued jobs until done is set and the queue is empty"""
+        try:
+            while True:
+                close_old_connections()
+                job = claim_next_job()
+                if job is None:
+                    if done.is_set():
+                        return
+                    time.sleep(0.05)
+                    continue
+                statuses.append(run_job(job).status)
+        finally:
+            connection.close()
+
+    def worker(self, index, kinds, results):
+        """Send requests as one farmer until the level's queue is empty"""
+        account = self.accounts[index % len(self.accounts)]
+        rng = random.Random(self.options['seed'] * 1000 + index)
+        client = Client(raise_request_exception=False)
+        client.force_login(account.user)
+        try:
+            while True:
+                try:
+                    kind = kinds.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.perf_counter()
+                try:
+                    status = self.send(client, kind, account, rng).status_code
+                except Exception as e:
+                    self.stderr.write(f"{kind}: {e}")
+                    status = None
+                results.append((kind, time.perf_counter() - started, status))
+        finally:
+            connection.close()
+
+    def send(self, client, kind, account, rng):
+        if kind == 'farm_details':
+            return client.get(reverse('core:farm_details'))
+        if kind == 'crop_plan':
+            data = {
+                'crop_name': rng.choice(CROPS),
+                'planting_date': (date.today() + timedelta(days=rng.randint(0, 30))).isoformat(),
+            }
+            if self.options['mode']:
+                data['mode'] = self.options['mode']
+            return client.post(reverse('core:crop_plan'), data)
+        if kind == 'plan_detail':
+            return client.get(reverse('core:plan_detail', args=[rng.choice(account.plan_ids)]))
+        if kind == 'monitoring_dashboard':
+            return client.get(reverse('core:monitoring_dashboard'))
+        return client.post(reverse('core:complete_task', args=[rng.choice(account.task_ids)]), {'notes': 'done'})
+
+    def summarize(self, rows):
+        latencies = [row[1] * 1000 for row in rows]
+        errors = sum(1 for kind, _, status in rows if status != EXPECTED_STATUS[kind])
+        return {
+            'requests': len(rows),
+            'errors': errors,
+            'error_rate': round(errors / len(rows), 4) if rows else 0.0,
+            'mean_ms': round(sum(latencies) / len(latencies), 2) if rows else 0.0,
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+        }
+
+    def commit(self):
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True
+            )
+        except OSError:
+            return None
+        return result.stdout.strip() or None
@@ -0,0 +1,94 @@
+# core/management/commands/bench_schedules.py
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.benchmarks import Timer, scratch_database
+from core.models import CropPlan, Farm, MonitoringRecurrence, MonitoringSchedule
+from core.monitoring import create_schedule_rules, upcoming_tasks
+from core.utils import generate_monitoring_schedule
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark monitoring schedule storage on a scratch database: "
+        "recurrence rules per batch of plans vs. one saved row per occurrence"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Plans saved per transaction in the rules path")
+        parser.add_argument('--naive-plans', type=int, default=200,
+                            help="Plans timed with the per-row loop (extrapolated)")
+        parser.add_argument('--on-disk', action='store_true',
+                            help="Use a temporary SQLite file instead of memory")
+
+    def handle(self, *args, **options):
+        with scratch_database(on_disk=options['on_disk']):
+            user = User.objects.create(username='bench')
+            farm = Farm.objects.create(
+                user=user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice'
+            )
+            crops = ['wheat', 'rice', 'corn', 'cotton', 'tomato']
+            start = date.today()
+
+            def make_plans(count):
+                return [
+                    CropPlan(
+                        farm=farm,
+                        crop_name=crops[i % len(crops)],
+                        planting_date=start + timedelta(days=i % 365),
+                        harvest_date=start + timedelta(days=i % 365 + 90),
+                        monitoring_frequency='weekly',
+                    )
+                    for i in range(count)
+                ]
+
+            # Before: plan.save() then one INSERT per generated task
+            with Timer() as naive:
+                for plan in make_plans(options['naive_plans']):
+                    with transaction.atomic():
+                        plan.save()
+                        for task in generate_monitoring_schedule(plan):
+                            MonitoringSchedule.objects.create(crop_plan=plan, **task)
+            naive_rows = MonitoringSchedule.objects.count()
+            MonitoringSchedule.objects.all().delete()
+            CropPlan.objects.all().delete()
+
+            # After: bulk insert plans, then one recurrence rule per template task
+            plans = make_plans(options['plans'])
+            with Timer() as bulk:
+                for i in range(0, len(plans), options['batch_size']):
+                    with transaction.atomic():
+                        saved = CropPlan.objects.bulk_create(plans[i:i + options['batch_size']])
+                        create_schedule_rules(saved)
+            bulk_rows = MonitoringRecurrence.objects.count()
+            naive_rows_total = sum(
+                len(generate_monitoring_schedule(plan)) for plan in plans
+            )
+
+            # Dashboard read: next 10 tasks across 50 active plans
+            active = CropPlan.objects.order_by('-planting_date')[:50]
+            with Timer() as read:
+                upcoming = upcoming_tasks(active, start, limit=10)
+
+        naive_per_plan = naive.elapsed / max(options['naive_plans'], 1)
+        self.stdout.write(
+            f"per-row loop: {options['naive_plans']} plans / {naive_rows} rows in "
+            f"{naive.elapsed:.2f}s -> {naive_per_plan * options['plans']:.1f}s "
+            f"extrapolated to {options['plans']} plans"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"recurrence rules: {options['plans']} plans / {bulk_rows} rows in {bulk.elapsed:.2f}s "
+            f"({naive_per_plan * options['plans'] / bulk.elapsed:.0f}x faster)"
+        ))
+        self.stdout.write(
+            f"table size: {bulk_rows} rule rows instead of {naive_rows_total} occurrence rows "
+            f"({naive_rows_total / max(bulk_rows, 1):.0f}x smaller)"
+        )
+        self.stdout.write(
+            f"upcoming_tasks: {len(upcoming)} tasks from 50 plans in {read.elapsed * 1000:.1f}ms"
+        )
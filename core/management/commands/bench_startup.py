@@ -0,0 +1,81 @@
+# core/management/commands/bench_startup.py
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter per measurement. Times app start (settings,
+# apps, URLconf -- what a WSGI/ASGI worker does before serving), the first
+# request (a template-rendering page) and the first Gemini model handle,
+# which the first LLM-backed request needs before it can call out.
+CHILD = """
+import json, os, time
+started = time.perf_counter()
+if os.environ.get('BENCH_EAGER_GOOGLE') == '1':
+    # What module-level imports in core.utils/core.views used to cost
+    import google.generativeai
+    import google.api_core.exceptions
+import django
+django.setup()
+from django.urls import get_resolver, reverse
+get_resolver().url_patterns
+app_ready = time.perf_counter()
+
+from django.test import Client
+response = Client(HTTP_HOST='localhost').get(reverse('login'))
+assert response.status_code == 200, response.status_code
+first_request = time.perf_counter()
+
+from core.utils import get_gemini_model
+get_gemini_model()
+first_model = time.perf_counter()
+
+print(json.dumps({
+    'app_ready': app_ready - started,
+    'first_request': first_request - app_ready,
+    'first_model': first_model - first_request,
+}))
+"""
+
+VARIANTS = [
+    ('eager google imports (before)', {'BENCH_EAGER_GOOGLE': '1', 'DJANGO_WARM_UP': '0'}),
+    ('lazy imports, no warm-up', {'DJANGO_WARM_UP': '0'}),
+    ('lazy imports + warm-up (server)', {'DJANGO_WARM_UP': '1'}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark cold start in fresh processes: app start-up time, first "
+        "request and first Gemini client use, with eager vs. lazy Google "
+        "imports and with the start-up warm-up"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Fresh processes per variant")
+
+    def measure(self, env):
+        result = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', CHILD],
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE'], **env},
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"median of {options['runs']} fresh processes, ms")
+        self.stdout.write(f"{'':34} {'app ready':>10} {'1st request':>12} {'1st model':>10} {'total':>8}")
+        for label, env in VARIANTS:
+            runs = [self.measure(env) for _ in range(options['runs'])]
+            times = {
+                name: median(run[name] for run in runs) * 1000
+                for name in ('app_ready', 'first_request', 'first_model')
+            }
+            self.stdout.write(
+                f"{label:34} {times['app_ready']:10.1f} {times['first_request']:12.1f} "
+                f"{times['first_model']:10.1f} {sum(times.values()):8.1f}"
+            )
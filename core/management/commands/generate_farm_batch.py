@@ -0,0 +1,155 @@
+# core/management/commands/generate_farm_batch.py
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import CropPlan, CropRecommendation, Farm
+from core.monitoring import create_schedule_rules
+from core import rules
+from core.recommendations import build_recommendation, save_recommendations
+from core.utils import (
+    apply_daily_plan,
+    generate_crop_plan,
+    generate_recommendation_text,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate crop recommendations and crop plans for many farms. "
+        "Farms that already have today's output are skipped, so re-running "
+        "the same command resumes an interrupted batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('farm_ids', nargs='*', type=int, help="Farm IDs to process")
+        parser.add_argument('--all', action='store_true', help="Process every farm")
+        parser.add_argument('--location', help="Only farms whose location contains this text")
+        parser.add_argument('--soil', help="Only farms with this soil type")
+        parser.add_argument('--crop', help="Crop to plan for (required unless --skip-plans)")
+        parser.add_argument('--planting-date', type=date.fromisoformat, default=None,
+                            help="Planting date for the plans, YYYY-MM-DD (default: today)")
+        parser.add_argument('--skip-recommendations', action='store_true')
+        parser.add_argument('--skip-plans', action='store_true')
+        parser.add_argument('--mode', choices=rules.MODES, default=None,
+                            help="Rules, rules then Gemini, or Gemini only (default: settings.GENERATION_MODE)")
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help="Farms generated in parallel")
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help="Rows written per bulk insert")
+
+    def handle(self, *args, **options):
+        if not options['skip_plans'] and not options['crop']:
+            raise CommandError("--crop is required unless --skip-plans is given")
+        if not (options['all'] or options['farm_ids'] or options['location'] or options['soil']):
+            raise CommandError("Give farm IDs, --location, --soil or --all")
+
+        self.options = options
+        self.crop_name = (options['crop'] or '').lower()
+        self.planting_date = options['planting_date'] or date.today()
+        self.started_on = date.today()
+
+        farms = Farm.objects.order_by('id')
+        if options['farm_ids']:
+            farms = farms.filter(id__in=options['farm_ids'])
+        if options['location']:
+            farms = farms.filter(location__icontains=options['location'])
+        if options['soil']:
+            farms = farms.filter(soil_type=options['soil'])
+
+        total = farms.count()
+        self.stdout.write(f"Processing {total} farm(s) with concurrency {options['concurrency']}")
+
+        self.pending_recommendations = []
+        self.pending_plans = []
+        self.processed = self.failed = 0
+        self.started = time.monotonic()
+        in_flight = set()
+
+        try:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                for farm in farms.iterator():
+                    # Keep a bounded window of submitted work
+                    if len(in_flight) >= options['concurrency'] * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        self.collect(done, total)
+                    in_flight.add(executor.submit(self.generate_for_farm, farm))
+
+                done, _ = wait(in_flight)
+                self.collect(done, total)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Interrupted; saving finished farms"))
+        finally:
+            self.flush()
+
+        self.report(total, final=True)
+
+    def generate_for_farm(self, farm):
+        """Run in a worker thread; returns unsaved rows for the main thread to write"""
+        try:
+            recommendation = plan = None
+
+            if not self.options['skip_recommendations'] and not CropRecommendation.objects.filter(
+                farm=farm, created_at__date__gte=self.started_on
+            ).exists():
+                recommendation = build_recommendation(
+                    farm, generate_recommendation_text(farm, self.options['mode'])
+                )
+
+            if not self.options['skip_plans'] and not CropPlan.objects.filter(
+                farm=farm, crop_name=self.crop_name, planting_date=self.planting_date
+            ).exists():
+                plan = CropPlan(
+                    farm=farm,
+                    crop_name=self.crop_name,
+                    planting_date=self.planting_date,
+                )
+                apply_daily_plan(plan, generate_crop_plan(
+                    self.crop_name,
+                    self.planting_date.strftime('%Y-%m-%d'),
+                    farm.soil_type,
+                    self.options['mode']
+                ))
+
+            return farm, recommendation, plan, None
+        except Exception as e:
+            return farm, None, None, e
+        finally:
+            connection.close()
+
+    def collect(self, futures, total):
+        for future in futures:
+            farm, recommendation, plan, error = future.result()
+            self.processed += 1
+            if error is not None:
+                self.failed += 1
+                self.stderr.write(f"Farm {farm.id}: {error}")
+            if recommendation is not None:
+                self.pending_recommendations.append(recommendation)
+            if plan is not None:
+                self.pending_plans.append(plan)
+
+            if len(self.pending_recommendations) + len(self.pending_plans) >= self.options['batch_size']:
+                self.flush()
+                self.report(total)
+
+    def flush(self):
+        with transaction.atomic():
+            save_recommendations(self.pending_recommendations)
+            CropPlan.store_documents(self.pending_plans)
+            plans = CropPlan.objects.bulk_create(self.pending_plans)
+            create_schedule_rules(plans)
+        self.pending_recommendations = []
+        self.pending_plans = []
+
+    def report(self, total, final=False):
+        elapsed = time.monotonic() - self.started
+        rate = self.processed / elapsed * 60 if elapsed else 0
+        line = (
+            f"{self.processed}/{total} farms, {self.failed} failed, "
+            f"{elapsed:.1f}s elapsed, {rate:.1f} farms/min"
+        )
+        self.stdout.write(self.style.SUCCESS(line) if final else line)
@@ -0,0 +1,21 @@
+# core/management/commands/purge_plan_documents.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.models import PlanDocument
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete plan documents no crop plan uses any more, left behind by deleted "
+        "plans and replaced pesticide recommendations. Run it periodically (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help="Keep documents younger than this many seconds")
+
+    def handle(self, *args, **options):
+        deleted = PlanDocument.delete_orphans(timedelta(seconds=options['min_age']))
+        self.stdout.write(f"Deleted {deleted} unused plan document(s)")
@@ -0,0 +1,51 @@
+# core/management/commands/run_generation_worker.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued crop plan / recommendation / pesticide generation jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue and exit instead of polling forever")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help="Exit after this many jobs (0 = no limit)")
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help="Re-queue running jobs older than this many seconds")
+
+    def handle(self, *args, **options):
+        processed = 0
+        requeued, failed = requeue_stale_jobs(options['stale_after'])
+        if requeued or failed:
+            self.stdout.write(f"Re-queued {requeued} stale job(s), failed {failed} out of attempts")
+
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                requeue_stale_jobs(options['stale_after'])
+                continue
+
+            started = time.monotonic()
+            job = run_job(job)
+            self.stdout.write(
+                f"{job} in {time.monotonic() - started:.2f}s"
+                + (f": {job.error}" if job.error else "")
+            )
+
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)"))
@@ -0,0 +1,91 @@
+# core/management/commands/warm_cache.py
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+
+from core import knowledge_base, llm_store
+from core.cache_keys import normalize_crop
+from core.models import CropPlan
+from core.schemas import PESTICIDE_SCHEMA
+from core.utils import GEMINI_MODEL_NAME, build_pesticide_prompt, get_pesticide_recommendations
+
+# One pesticide answer to pre-generate. Crop plans aren't warmed: their
+# prompt and cache key include the planting date, so a plan warmed for one
+# date is never asked for on another.
+Entry = namedtuple('Entry', 'crop stage weight')
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-generate Gemini pesticide recommendations for the most planted crops "
+        "at every growth stage. Answers land in the cache and the persistent LLM "
+        "response store, so the first requests after a deploy don't wait for "
+        "Gemini. Already stored answers are skipped, so the command is cheap to "
+        "re-run; --concurrency bounds the Gemini calls in flight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help="Number of most planted crops to warm")
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help="Gemini calls in flight at once")
+        parser.add_argument('--dry-run', action='store_true', help="List what would be warmed and exit")
+
+    def handle(self, *args, **options):
+        self.options = options
+        entries = self.entries()
+
+        if options['dry_run']:
+            for entry in entries:
+                self.stdout.write(f"pesticides {entry.crop} {entry.stage} ({entry.weight} plans)")
+            return
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            outcomes = Counter(pool.map(self.warm, entries))
+        summary = ', '.join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(entries)} entries in {time.monotonic() - started:.1f}s: {summary or 'nothing to do'}"
+        ))
+
+    def entries(self):
+        """Warm-up entries, most planted crops first"""
+        # Group spellings ("Paddy", "rice ") by cache key name, keeping the
+        # most common spelling for the prompt
+        crops = {}
+        crop_counts = Counter()
+        for row in CropPlan.objects.values('crop_name').annotate(plans=Count('id')).order_by('-plans'):
+            name = normalize_crop(row['crop_name'])
+            crops.setdefault(name, row['crop_name'])
+            crop_counts[name] += row['plans']
+
+        return [
+            Entry(crops[name], stage, plans)
+            for name, plans in crop_counts.most_common(self.options['top'])
+            for stage in knowledge_base.get().stages
+        ]
+
+    def stored(self, entry):
+        prompt = build_pesticide_prompt(entry.crop, entry.stage)
+        return llm_store.get(GEMINI_MODEL_NAME, prompt, {'schema': PESTICIDE_SCHEMA}) is not None
+
+    def warm(self, entry):
+        try:
+            if self.stored(entry):
+                return 'already stored'
+            # Through the normal cached path, so a web request asking for the
+            # same answer meanwhile shares this call (single-flight)
+            get_pesticide_recommendations(entry.crop, entry.stage)
+            # Gemini errors fall back to defaults without storing them
+            return 'generated' if self.stored(entry) else 'failed'
+        except ValidationError:
+            return 'rate limited'
+        except Exception as e:
+            self.stderr.write(f"pesticides {entry.crop} {entry.stage}: {e}")
+            return 'failed'
+        finally:
+            connection.close()
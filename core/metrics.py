@@ -0,0 +1,199 @@
+# core/metrics.py
+"""
+In-process metrics, exported in the Prometheus text format at /metrics/.
+
+Counters and histograms keep one entry per label combination and are
+updated under a per-metric lock: an observation is a bisect and a couple
+of additions, cheap enough to leave on in production. Like the other
+stats in this app the numbers are per process; Prometheus aggregates
+across workers. Counters kept elsewhere (cache key families, the LLM
+response store, structured output outcomes, rule engine paths) are
+exported as they are at scrape time.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from . import timing
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _header(name, help_text, kind):
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def lines(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in values]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def lines(self):
+        with self._lock:
+            values = sorted((labels, list(counts), total) for labels, (counts, total) in self._values.items())
+        lines = []
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                le = _labels(self.label_names, labels, [('le', bound)])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = _labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+LLM_REQUEST_SECONDS = Histogram(
+    'superagri_llm_request_seconds', "Gemini call latency by calling function and outcome",
+    ['function', 'outcome'], LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    'superagri_llm_tokens_total', "Tokens sent to (prompt) and received from (response) Gemini",
+    ['function', 'direction'],
+)
+CACHE_GENERATE_SECONDS = Histogram(
+    'superagri_cache_generate_seconds', "Time spent generating cache misses in get_cached_or_generate",
+    ['family'], LLM_BUCKETS,
+)
+FALLBACKS = Counter(
+    'superagri_llm_fallbacks_total', "Answers served from built-in defaults after a Gemini failure",
+    ['default'],
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    'superagri_rate_limit_rejections_total', "Requests refused by a rate limit",
+    ['rule'],
+)
+REQUEST_SECONDS = Histogram(
+    'superagri_request_seconds', "Request latency by view, method and status class",
+    ['view', 'method', 'status'],
+)
+
+
+class LLMCall:
+    response = None
+
+
+@contextmanager
+def llm_call(function):
+    """
+    Time one Gemini call, for the metrics and the request's Server-Timing,
+    and count its tokens. Set .response on the yielded object so token
+    usage can be read from it.
+    """
+    call = LLMCall()
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield call
+        outcome = 'ok'
+    finally:
+        elapsed = time.perf_counter() - started
+        LLM_REQUEST_SECONDS.observe(elapsed, function, outcome)
+        timing.record('llm', elapsed)
+        usage = getattr(call.response, 'usage_metadata', None)
+        for direction, field in (('prompt', 'prompt_token_count'), ('response', 'candidates_token_count')):
+            count = getattr(usage, field, None)
+            if isinstance(count, int):
+                LLM_TOKENS.inc(function, direction, amount=count)
+
+
+def _stats_lines():
+    """Counters kept by other modules, exported as they are"""
+    from . import llm_store, rules
+    from .cache_keys import hit_ratios
+    from .utils import structured_output_stats
+
+    lines = _header('superagri_cache_lookups_total', "Cache lookups per key family", 'counter')
+    ratios = hit_ratios()
+    for family, counts in sorted(ratios.items()):
+        for result in ('hits', 'misses'):
+            lines.append(f"superagri_cache_lookups_total{_labels(('family', 'result'), (family, result))} {counts[result]}")
+    lines += _header('superagri_cache_hit_ratio', "Cache hit ratio per key family", 'gauge')
+    for family, counts in sorted(ratios.items()):
+        if counts['hit_ratio'] is not None:
+            lines.append(f"superagri_cache_hit_ratio{_labels(('family',), (family,))} {counts['hit_ratio']}")
+
+    lines += _header('superagri_llm_store_events_total', "Persistent LLM response store events", 'counter')
+    for event, count in sorted(llm_store.stats().items()):
+        lines.append(f"superagri_llm_store_events_total{_labels(('event',), (event,))} {count}")
+
+    lines += _header('superagri_structured_output_total', "Structured Gemini output outcomes", 'counter')
+    for outcome, count in sorted(structured_output_stats().items()):
+        lines.append(f"superagri_structured_output_total{_labels(('outcome',), (outcome,))} {count}")
+
+    lines += _header('superagri_generation_path_total', "Requests answered by the rules or by Gemini", 'counter')
+    for kind, paths in sorted(rules.path_stats().items()):
+        for path, count in sorted(paths.items()):
+            lines.append(f"superagri_generation_path_total{_labels(('kind', 'path'), (kind, path))} {count}")
+    return lines
+
+
+def render():
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines += _header(metric.name, metric.help_text, metric.kind)
+        lines += metric.lines()
+    lines += _stats_lines()
+    return '\n'.join(lines) + '\n'
@@ -1,22 +1,54 @@
 # core/middleware.py
-from django.core.cache import cache
+import time
+
 from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from . import metrics, ratelimit
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    # First in MIDDLEWARE so the latency covers the whole stack, including
+    # responses short-circuited by later middleware (429s, redirects)
+    def process_request(self, request):
+        request._metrics_started = time.perf_counter()
+
+    def process_response(self, request, response):
+        started = getattr(request, '_metrics_started', None)
+        if started is not None:
+            match = getattr(request, 'resolver_match', None)
+            metrics.REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                match.view_name if match is not None else 'unmatched',
+                request.method,
+                f"{response.status_code // 100}xx",
+            )
+        return response
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    # MiddlewareMixin makes this usable in both WSGI and ASGI stacks, so async
+    # views are not forced back onto a sync thread by this middleware.
+    def process_request(self, request):
+        rule = ratelimit.match_rule(request.path, request.method)
+        if rule is None:
+            return None
+
+        # Budget per account when logged in (farmers often share an IP)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            client = f"user{user.pk}"
+        else:
+            client = request.META.get('REMOTE_ADDR')
 
-class RateLimitMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        if request.path.startswith('/api/'):
-            ip = request.META.get('REMOTE_ADDR')
-            requests = cache.get(f'requests_{ip}', 0)
-            
-            if requests >= 100:  # 100 requests per hour limit
-                return HttpResponse(
-                    'Rate limit exceeded. Please try again later.',
-                    status=429  # 429 is the status code for Too Many Requests
-                )
-            
-            cache.set(f'requests_{ip}', requests + 1, 3600)  # 1 hour expiry
+        allowed, retry_after = ratelimit.hit(client, rule)
+        if not allowed:
+            metrics.RATE_LIMIT_REJECTIONS.inc(rule['name'])
+            response = HttpResponse(
+                'Rate limit exceeded. Please try again later.',
+                status=429  # 429 is the status code for Too Many Requests
+            )
+            response['Retry-After'] = str(retry_after)
+            return response
         
-        return self.get_response(request)
\ No newline at end of file
+        return None
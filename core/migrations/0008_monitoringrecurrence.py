@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_ratelimitcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonitoringRecurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_type', models.CharField(max_length=50)),
+                ('description', models.TextField()),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('interval_days', models.PositiveSmallIntegerField()),
+                ('crop_plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurrences', to='core.cropplan')),
+            ],
+            options={
+                'ordering': ['start_date', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='monitoringschedule',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='core.monitoringrecurrence'),
+        ),
+        migrations.AddConstraint(
+            model_name='monitoringschedule',
+            constraint=models.UniqueConstraint(fields=('recurrence', 'date'), name='unique_recurrence_occurrence'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_monitoringrecurrence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cropplan',
+            index=models.Index(fields=['farm', 'harvest_date'], name='cropplan_farm_harvest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='croprecommendation',
+            index=models.Index(fields=['farm', '-created_at'], name='croprec_farm_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitoringrecurrence',
+            index=models.Index(fields=['crop_plan', 'end_date'], name='recurrence_plan_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitoringschedule',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['crop_plan', 'date'], name='schedule_open_plan_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pestalert',
+            index=models.Index(condition=models.Q(('resolved', False)), fields=['farm', 'detection_date'], name='pestalert_open_farm_idx'),
+        ),
+    ]
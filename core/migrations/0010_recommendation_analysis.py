@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='croprecommendation',
+            name='analysis',
+            field=models.JSONField(default=dict),
+        ),
+    ]
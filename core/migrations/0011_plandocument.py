@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recommendation_analysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanDocument',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('content', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cropplan',
+            name='daily_plan_doc',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.plandocument'),
+        ),
+        migrations.AddField(
+            model_name='cropplan',
+            name='pesticides_doc',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.plandocument'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Copies plan JSON into PlanDocument rows. Kept apart from the column
+# removal in 0013: on PostgreSQL, altering a table with pending deferred
+# foreign key checks from this copy fails in the same transaction.
+
+import hashlib
+import json
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+DOCUMENT_FIELDS = [('daily_plan', 'daily_plan_doc'), ('pesticides', 'pesticides_doc')]
+
+
+def content_hash(content):
+    # Frozen copy of core.models.content_hash
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def share_documents(apps, schema_editor):
+    """Move each plan's JSON into one PlanDocument per distinct content"""
+    CropPlan = apps.get_model('core', 'CropPlan')
+    PlanDocument = apps.get_model('core', 'PlanDocument')
+    stored = set()
+
+    def flush(groups, documents):
+        PlanDocument.objects.bulk_create(documents, ignore_conflicts=True)
+        # Most plans share their documents with many others: one UPDATE per
+        # distinct pair rather than one per plan
+        for keys, ids in groups.items():
+            CropPlan.objects.filter(pk__in=ids).update(
+                **{f'{doc}_id': key for (_, doc), key in zip(DOCUMENT_FIELDS, keys)}
+            )
+
+    groups, documents, count = {}, [], 0
+    plans = CropPlan.objects.only('id', 'daily_plan', 'pesticides').order_by('pk')
+    for plan in plans.iterator(chunk_size=BATCH_SIZE):
+        keys = []
+        for name, _ in DOCUMENT_FIELDS:
+            content = getattr(plan, name)
+            key = content_hash(content) if content else None
+            if key is not None and key not in stored:
+                stored.add(key)
+                documents.append(PlanDocument(hash=key, content=content))
+            keys.append(key)
+        groups.setdefault(tuple(keys), []).append(plan.pk)
+        count += 1
+        if count % BATCH_SIZE == 0:
+            flush(groups, documents)
+            groups, documents = {}, []
+    flush(groups, documents)
+
+
+def copy_documents_back(apps, schema_editor):
+    CropPlan = apps.get_model('core', 'CropPlan')
+    plans = []
+    for plan in CropPlan.objects.select_related('daily_plan_doc', 'pesticides_doc').iterator(chunk_size=BATCH_SIZE):
+        for name, doc in DOCUMENT_FIELDS:
+            document = getattr(plan, doc)
+            setattr(plan, name, document.content if document is not None else {})
+        plans.append(plan)
+    CropPlan.objects.bulk_update(plans, [name for name, _ in DOCUMENT_FIELDS], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_plandocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(share_documents, copy_documents_back),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:27
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_share_plan_documents'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='cropplan',
+            name='daily_plan',
+        ),
+        migrations.RemoveField(
+            model_name='cropplan',
+            name='pesticides',
+        ),
+    ]
@@ -1,5 +1,10 @@
-from django.db import models
+import hashlib
+import json
+from datetime import timedelta
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Farm(models.Model):
     SOIL_CHOICES = [
@@ -19,21 +24,173 @@ class Farm(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Farm - {self.location}"
 
+def content_hash(content):
+    """sha256 of the canonical JSON form of a plan document"""
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class PlanDocument(models.Model):
+    """
+    A generated daily plan or pesticide recommendation. Stored once per
+    distinct content and shared by every CropPlan that uses it, so never
+    edited in place. created_at is refreshed each time a plan save stores
+    the document again, so orphan cleanup leaves it alone while that plan
+    is being written.
+    """
+    hash = models.CharField(max_length=64, primary_key=True)
+    content = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def for_content(cls, content):
+        """An unsaved document for content, keyed by its hash"""
+        return cls(hash=content_hash(content), content=content)
+
+    @classmethod
+    def delete_orphans(cls, min_age=timedelta(hours=1), batch_size=500):
+        """
+        Delete documents no crop plan points at any more. Documents stored
+        within min_age are kept: a plan being saved right now may have
+        stored its document but not yet itself.
+        """
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                # Locked (PostgreSQL; SQLite serializes writers anyway), so a
+                # concurrent save re-storing one of these waits for the delete
+                # and then inserts it afresh, or holds it and makes the
+                # created_at check fail when the lock is granted
+                orphans = cls._orphans(min_age).select_for_update()
+                hashes = list(orphans.values_list('hash', flat=True)[:batch_size])
+                if not hashes:
+                    return deleted
+                # Re-check under the locks before deleting
+                count, _ = cls._orphans(min_age).filter(hash__in=hashes).delete()
+                deleted += count
+            if len(hashes) < batch_size:
+                return deleted
+
+    @classmethod
+    def _orphans(cls, min_age):
+        orphans = cls.objects.filter(created_at__lt=timezone.now() - min_age)
+        for name in CropPlan.DOCUMENT_FIELDS:
+            # Nulls left in a NOT IN subquery would match nothing
+            orphans = orphans.exclude(
+                hash__in=CropPlan.objects.filter(**{f'{name}__isnull': False}).values(name)
+            )
+        return orphans
+
+
+def _document_content(name):
+    """Read and assign a CropPlan document foreign key by its content"""
+    def get(plan):
+        document = getattr(plan, name)
+        return document.content if document is not None else {}
+
+    def set(plan, content):
+        setattr(plan, name, PlanDocument.for_content(content) if content else None)
+
+    return property(get, set)
+
+
 class CropPlan(models.Model):
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE)
     crop_name = models.CharField(max_length=100)
     planting_date = models.DateField()
     harvest_date = models.DateField()
-    daily_plan = models.JSONField(default=dict)
-    pesticides = models.JSONField(default=dict)
+    daily_plan_doc = models.ForeignKey(
+        'PlanDocument', null=True, blank=True, on_delete=models.PROTECT, related_name='+'
+    )
+    pesticides_doc = models.ForeignKey(
+        'PlanDocument', null=True, blank=True, on_delete=models.PROTECT, related_name='+'
+    )
     monitoring_frequency = models.CharField(max_length=50)
 
+    DOCUMENT_FIELDS = ['daily_plan_doc', 'pesticides_doc']
+
+    class Meta:
+        indexes = [
+            # Current plans of a farm: farm=..., harvest_date >= today
+            models.Index(fields=['farm', 'harvest_date'], name='cropplan_farm_harvest_idx'),
+        ]
+
     def __str__(self):
         return f"{self.crop_name} - {self.farm.location}"
 
+    daily_plan = _document_content('daily_plan_doc')
+    pesticides = _document_content('pesticides_doc')
+
+    def save(self, *args, **kwargs):
+        CropPlan.store_documents([self])
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def store_documents(cls, plans):
+        """Insert the newly assigned plan documents of plans; needed before bulk_create"""
+        documents = {}
+        for plan in plans:
+            for name in cls.DOCUMENT_FIELDS:
+                if not cls._meta.get_field(name).is_cached(plan):
+                    continue
+                document = getattr(plan, name)
+                if document is not None and document._state.adding:
+                    documents[document.hash] = document
+        if documents:
+            # Existing documents get a fresh created_at (see PlanDocument)
+            now = timezone.now()
+            for document in documents.values():
+                document.created_at = now
+            PlanDocument.objects.bulk_create(
+                documents.values(), update_conflicts=True, unique_fields=['hash'], update_fields=['created_at']
+            )
+            for document in documents.values():
+                document._state.adding = False
+
+
+class MonitoringRecurrence(models.Model):
+    """
+    One recurring monitoring task of a crop plan (e.g. irrigation check every
+    3 days of the initial stage). Occurrences are expanded on demand; only
+    completed occurrences are stored, as MonitoringSchedule rows.
+    """
+    crop_plan = models.ForeignKey('CropPlan', on_delete=models.CASCADE, related_name='recurrences')
+    task_type = models.CharField(max_length=50)
+    description = models.TextField()
+    start_date = models.DateField()
+    end_date = models.DateField()  # last occurrence, inclusive
+    interval_days = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['start_date', 'id']
+        indexes = [
+            # Active rules of a plan: crop_plan=..., end_date >= today
+            models.Index(fields=['crop_plan', 'end_date'], name='recurrence_plan_end_idx'),
+        ]
+
+    def occurs_on(self, day):
+        return (
+            self.start_date <= day <= self.end_date
+            and (day - self.start_date).days % self.interval_days == 0
+        )
+
+    def occurrence_dates(self, since):
+        """Occurrence dates on or after since, in order"""
+        first = max(since, self.start_date)
+        steps = -(-(first - self.start_date).days // self.interval_days)  # ceil
+        day = self.start_date + timedelta(days=steps * self.interval_days)
+        step = timedelta(days=self.interval_days)
+        while day <= self.end_date:
+            yield day
+            day += step
+
 
 class MonitoringSchedule(models.Model):
     crop_plan = models.ForeignKey('CropPlan', on_delete=models.CASCADE)
+    # Set when this row records a completed occurrence of a recurrence
+    recurrence = models.ForeignKey(
+        MonitoringRecurrence, on_delete=models.CASCADE, null=True, blank=True, related_name='exceptions'
+    )
     date = models.DateField()
     task_type = models.CharField(max_length=50)  # irrigation, fertilization, pest_check, etc.
     description = models.TextField()
@@ -42,6 +199,18 @@ class MonitoringSchedule(models.Model):
 
     class Meta:
         ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['recurrence', 'date'], name='unique_recurrence_occurrence'),
+        ]
+        indexes = [
+            # Upcoming open tasks of a plan; completed rows are the bulk of
+            # the table and never need to be scanned by the dashboard
+            models.Index(
+                fields=['crop_plan', 'date'],
+                condition=models.Q(completed=False),
+                name='schedule_open_plan_date_idx',
+            ),
+        ]
 
 class PestAlert(models.Model):
     farm = models.ForeignKey('Farm', on_delete=models.CASCADE)
@@ -52,6 +221,15 @@ class PestAlert(models.Model):
     recommended_action = models.TextField()
     resolved = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['farm', 'detection_date'],
+                condition=models.Q(resolved=False),
+                name='pestalert_open_farm_idx',
+            ),
+        ]
+
 # core/models.py
 class CropRecommendation(models.Model):
     farm = models.ForeignKey('Farm', on_delete=models.CASCADE)
@@ -62,9 +240,15 @@ class CropRecommendation(models.Model):
     soil_description = models.TextField()
     previous_crop_impact = models.TextField()
     water_analysis = models.TextField(null=True)
+    # Points of each analysis section, parsed once when the report is saved
+    analysis = models.JSONField(default=dict)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Latest recommendation of a farm
+            models.Index(fields=['farm', '-created_at'], name='croprec_farm_created_idx'),
+        ]
 
     def __str__(self):
         return f"Recommendations for {self.farm.location} - {self.created_at.date()}"
@@ -88,4 +272,63 @@ class RecommendedCrop(models.Model):
     maturity = models.TextField(null=True, blank=True)
 
     class Meta:
-        ordering = ['option_number', 'id']
\ No newline at end of file
+        ordering = ['option_number', 'id']
+
+class GenerationJob(models.Model):
+    KIND_CHOICES = [
+        ('crop_plan', 'Crop Plan'),
+        ('recommendation', 'Crop Recommendation'),
+        ('pesticides', 'Pesticide Recommendation'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} job #{self.pk} ({self.status})"
+
+
+class LLMResponse(models.Model):
+    """Raw model output stored by a hash of the model name and normalized prompt"""
+    key = models.CharField(max_length=64, primary_key=True)
+    model_name = models.CharField(max_length=100)
+    response_text = models.TextField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-last_accessed']
+
+    def __str__(self):
+        return f"{self.model_name} response {self.key[:12]}"
+
+
+class RateLimitCounter(models.Model):
+    """Request count for one client and route budget in one fixed window"""
+    key = models.CharField(max_length=200)
+    window_start = models.PositiveBigIntegerField()  # epoch seconds
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'window_start'], name='unique_rate_limit_window'),
+        ]
@@ -0,0 +1,329 @@
+# core/monitoring.py
+"""
+Monitoring template registry.
+
+core/data/monitoring_templates.json is loaded and validated once per
+process and reloaded only when its mtime changes. Each crop's stages are
+precompiled into absolute day offsets from planting, so expanding a
+schedule is plain arithmetic with no file I/O.
+"""
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+from itertools import islice
+from datetime import timedelta
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import Case, TextField, Value, When
+
+from . import dashboard
+from .cache_keys import normalize_crop
+from .models import MonitoringRecurrence, MonitoringSchedule
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_PATH = Path(__file__).resolve().parent / 'data' / 'monitoring_templates.json'
+
+# Used when the JSON file is missing or invalid
+DEFAULT_TEMPLATE = {
+    "stages": [
+        {
+            "name": "Initial Growth",
+            "duration": 30,
+            "tasks": [
+                {
+                    "type": "irrigation",
+                    "interval": 3,
+                    "description": "Check soil moisture and irrigate {crop} seedlings if needed"
+                },
+                {
+                    "type": "pest_check",
+                    "interval": 7,
+                    "description": "Inspect {crop} plants for common pests and diseases"
+                }
+            ]
+        }
+    ]
+}
+
+# One recurring task within a stage. start/end are inclusive day offsets from
+# planting; offsets/deltas are the precomputed occurrence days.
+CompiledTask = namedtuple(
+    'CompiledTask', 'task_type stage start end interval description offsets deltas'
+)
+
+
+def validate_template(crop, template):
+    stages = template.get('stages') if isinstance(template, dict) else None
+    if not isinstance(stages, list) or not stages:
+        raise ValueError(f"{crop}: 'stages' must be a non-empty list")
+
+    for stage in stages:
+        if not isinstance(stage.get('name'), str):
+            raise ValueError(f"{crop}: every stage needs a name")
+        if not isinstance(stage.get('duration'), int) or stage['duration'] <= 0:
+            raise ValueError(f"{crop}/{stage['name']}: duration must be a positive integer")
+        for task in stage.get('tasks', []):
+            if not isinstance(task.get('type'), str) or not isinstance(task.get('description'), str):
+                raise ValueError(f"{crop}/{stage['name']}: tasks need a type and description")
+            if not isinstance(task.get('interval'), int) or task['interval'] <= 0:
+                raise ValueError(f"{crop}/{stage['name']}: interval must be a positive integer")
+
+
+def compile_template(template):
+    compiled = []
+    start = 0
+    for stage in template['stages']:
+        end = start + stage['duration']
+        for task in stage.get('tasks', []):
+            compiled.append(CompiledTask(
+                task_type=task['type'],
+                stage=stage['name'],
+                start=start,
+                end=end,
+                interval=task['interval'],
+                description=task['description'],
+                offsets=tuple(range(start, end + 1, task['interval'])),
+                deltas=tuple(
+                    timedelta(days=offset) for offset in range(start, end + 1, task['interval'])
+                ),
+            ))
+        start = end
+    return tuple(compiled)
+
+
+class MonitoringTemplateRegistry:
+    def __init__(self, path=TEMPLATES_PATH, check_interval=1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._compiled = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def _load(self, mtime):
+        try:
+            with open(self.path, 'r') as f:
+                templates = json.load(f)
+            if 'default' not in templates:
+                raise ValueError("a 'default' template is required")
+            for crop, template in templates.items():
+                validate_template(crop, template)
+        except (OSError, ValueError):
+            if self._compiled is not None:
+                logger.warning("Keeping previous monitoring templates", exc_info=True)
+                return
+            logger.warning("Using built-in monitoring template", exc_info=True)
+            templates = {'default': DEFAULT_TEMPLATE}
+
+        self._compiled = {
+            crop.lower(): compile_template(template)
+            for crop, template in templates.items()
+        }
+        self._mtime = mtime
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._compiled is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except OSError:
+                mtime = None
+            if self._compiled is None or mtime != self._mtime:
+                self._load(mtime)
+
+    def get(self, crop_name):
+        """Compiled tasks for a crop, falling back to the default template"""
+        self._refresh()
+        compiled = self._compiled
+        return compiled.get(normalize_crop(crop_name), compiled['default'])
+
+    def expand(self, crop_name, planting_date):
+        """Every task occurrence for a crop planted on planting_date"""
+        schedules = []
+        for task in self.get(crop_name):
+            description = task.description.format(crop=crop_name, stage=task.stage)
+            for delta in task.deltas:
+                schedules.append({
+                    'date': planting_date + delta,
+                    'task_type': task.task_type,
+                    'description': description,
+                })
+        return schedules
+
+
+monitoring_templates = MonitoringTemplateRegistry()
+
+
+def build_recurrences(crop_plans):
+    """Unsaved MonitoringRecurrence rows -- one per template task -- for saved plans"""
+    recurrences = []
+    for crop_plan in crop_plans:
+        planting_date = crop_plan.planting_date
+        for task in monitoring_templates.get(crop_plan.crop_name):
+            recurrences.append(MonitoringRecurrence(
+                crop_plan_id=crop_plan.pk,
+                task_type=task.task_type,
+                description=task.description.format(crop=crop_plan.crop_name, stage=task.stage),
+                start_date=planting_date + task.deltas[0],
+                end_date=planting_date + task.deltas[-1],
+                interval_days=task.interval,
+            ))
+    return recurrences
+
+
+def create_schedule_rules(crop_plans, batch_size=2000):
+    """Store the monitoring schedule of already saved crop plans as recurrence rules"""
+    recurrences = MonitoringRecurrence.objects.bulk_create(
+        build_recurrences(crop_plans), batch_size=batch_size
+    )
+    # bulk_create sends no signals
+    for farm_id in {crop_plan.farm_id for crop_plan in crop_plans}:
+        dashboard.invalidate(farm_id)
+    return recurrences
+
+
+def save_plan_with_schedule(crop_plan):
+    """Save a crop plan and its monitoring schedule in one transaction"""
+    with transaction.atomic():
+        crop_plan.save()
+        create_schedule_rules([crop_plan])
+    return crop_plan
+
+
+# A task shown on the dashboard: either an expanded recurrence occurrence
+# (recurrence_id set, id None) or a stored MonitoringSchedule row.
+Occurrence = namedtuple(
+    'Occurrence', 'date task_type description recurrence_id id crop_plan_id completed notes'
+)
+
+
+def upcoming_tasks(crop_plans, today, limit=10):
+    """
+    The next `limit` uncompleted tasks of the given plans, in date order.
+
+    Recurrences are expanded lazily and merged with a heap, so the cost
+    depends on the number of active rules and `limit`, not on how many
+    occurrences exist.
+    """
+    recurrences = list(
+        MonitoringRecurrence.objects.filter(crop_plan__in=crop_plans, end_date__gte=today)
+        .only('id', 'crop_plan_id', 'task_type', 'description',
+              'start_date', 'end_date', 'interval_days')
+    )
+    completed = set(
+        MonitoringSchedule.objects.filter(
+            recurrence__in=[r.id for r in recurrences], date__gte=today, completed=True
+        ).values_list('recurrence_id', 'date')
+    ) if recurrences else set()
+
+    def expand(recurrence):
+        for day in recurrence.occurrence_dates(today):
+            if (recurrence.id, day) not in completed:
+                yield Occurrence(
+                    day, recurrence.task_type, recurrence.description,
+                    recurrence.id, None, recurrence.crop_plan_id, False, None
+                )
+
+    # Rows stored without a rule (one-off tasks, older plans) still show up
+    stored = (
+        Occurrence(row.date, row.task_type, row.description,
+                   None, row.id, row.crop_plan_id, row.completed, row.notes)
+        for row in MonitoringSchedule.objects.filter(
+            crop_plan__in=crop_plans, recurrence__isnull=True, completed=False, date__gte=today
+        ).order_by('date')[:limit]
+    )
+
+    merged = heapq.merge(stored, *(expand(r) for r in recurrences), key=lambda o: o.date)
+    return list(islice(merged, limit))
+
+
+def complete_occurrences(occurrences):
+    """Record (recurrence, day, notes) occurrences as completed, in a single upsert"""
+    MonitoringSchedule.objects.bulk_create(
+        [
+            MonitoringSchedule(
+                recurrence=recurrence,
+                date=day,
+                crop_plan_id=recurrence.crop_plan_id,
+                task_type=recurrence.task_type,
+                description=recurrence.description,
+                completed=True,
+                notes=notes,
+            )
+            for recurrence, day, notes in occurrences
+        ],
+        update_conflicts=True,
+        unique_fields=['recurrence', 'date'],
+        update_fields=['completed', 'notes'],
+    )
+    for farm_id in {recurrence.crop_plan.farm_id for recurrence, _, _ in occurrences}:
+        dashboard.invalidate(farm_id)
+
+
+def complete_occurrence(recurrence, day, notes=''):
+    """Record one occurrence of a recurrence as completed"""
+    complete_occurrences([(recurrence, day, notes)])
+
+
+def complete_tasks(user, tasks):
+    """
+    Complete many of a user's tasks at once.
+
+    tasks is a list of {'id', 'notes'} for stored tasks or
+    {'recurrence_id', 'date', 'notes'} for occurrences of a recurrence.
+    Stored tasks are completed with one UPDATE ... WHERE id IN (...) and
+    occurrences with one upsert, in a single transaction. Returns
+    (completed, rejected): the items that were applied and those that don't
+    exist or don't belong to the user.
+    """
+    stored = {task['id']: task.get('notes', '') for task in tasks if 'id' in task}
+    occurrences = [task for task in tasks if 'recurrence_id' in task]
+    completed, rejected = [], []
+
+    with transaction.atomic():
+        if stored:
+            owned = dict(
+                MonitoringSchedule.objects.filter(id__in=stored, crop_plan__farm__user=user)
+                .values_list('id', 'crop_plan__farm_id')
+            )
+            if owned:
+                MonitoringSchedule.objects.filter(id__in=owned, crop_plan__farm__user=user).update(
+                    completed=True,
+                    notes=Case(
+                        *(When(id=task_id, then=Value(stored[task_id])) for task_id in owned),
+                        output_field=TextField(),
+                    ),
+                )
+                # update() sends no signals
+                for farm_id in set(owned.values()):
+                    dashboard.invalidate(farm_id)
+            completed += [{'id': task_id} for task_id in stored if task_id in owned]
+            rejected += [{'id': task_id} for task_id in stored if task_id not in owned]
+
+        if occurrences:
+            recurrences = MonitoringRecurrence.objects.select_related('crop_plan').filter(
+                id__in={task['recurrence_id'] for task in occurrences},
+                crop_plan__farm__user=user,
+            ).in_bulk()
+            valid = {}
+            for task in occurrences:
+                item = {'recurrence_id': task['recurrence_id'], 'date': task['date'].isoformat()}
+                recurrence = recurrences.get(task['recurrence_id'])
+                if recurrence is not None and recurrence.occurs_on(task['date']):
+                    # An upsert may touch each row once; the last notes win
+                    valid[recurrence.id, task['date']] = (recurrence, task['date'], task.get('notes', ''))
+                    completed.append(item)
+                else:
+                    rejected.append(item)
+            if valid:
+                complete_occurrences(list(valid.values()))
+
+    return completed, rejected
@@ -0,0 +1,127 @@
+# core/ratelimit.py
+"""
+Sliding-window rate limiting shared by every worker process.
+
+Counts live in the RateLimitCounter table and are bumped with a single
+``UPDATE ... SET count = count + 1``, so concurrent requests can't race past
+the limit and all processes see the same numbers. The sliding window is
+approximated from the current and previous fixed windows:
+
+    estimate = previous * (1 - elapsed / window) + current
+
+Requests over the limit are refused and not counted.
+"""
+import math
+import re
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.dispatch import receiver
+
+from .models import RateLimitCounter
+
+
+def _rules():
+    rules = []
+    for rule in getattr(settings, 'RATE_LIMITS', []):
+        rules.append({
+            **rule,
+            'regex': re.compile(rule['pattern']),
+            'methods': {m.upper() for m in rule.get('methods', [])},
+        })
+    return rules
+
+
+_compiled = None
+
+
+def get_rules():
+    global _compiled
+    if _compiled is None:
+        _compiled = _rules()
+    return _compiled
+
+
+@receiver(setting_changed)
+def _reset_rules(setting, **kwargs):
+    """Recompile after override_settings(RATE_LIMITS=...)"""
+    global _compiled
+    if setting == 'RATE_LIMITS':
+        _compiled = None
+
+
+def match_rule(path, method):
+    for rule in get_rules():
+        if rule['methods'] and method not in rule['methods']:
+            continue
+        if rule['regex'].match(path):
+            return rule
+    return None
+
+
+def _increment(key, window_start, window):
+    updated = RateLimitCounter.objects.filter(key=key, window_start=window_start).update(
+        count=F('count') + 1
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            RateLimitCounter.objects.create(key=key, window_start=window_start, count=1)
+    except IntegrityError:
+        # Another process created the window first
+        RateLimitCounter.objects.filter(key=key, window_start=window_start).update(
+            count=F('count') + 1
+        )
+        return
+
+    # First hit in a new window: drop windows that can no longer matter
+    RateLimitCounter.objects.filter(key=key, window_start__lt=window_start - window).delete()
+
+
+def hit(client, rule, now=None):
+    """
+    Count one request against a rule's budget.
+
+    Returns (allowed, retry_after_seconds). Rejected requests are not
+    counted, so a client retrying after retry_after is let through.
+    """
+    now = time.time() if now is None else now
+    window = rule['window']
+    limit = rule['limit']
+    window_start = int(now // window * window)
+    elapsed = now - window_start
+    key = f"{rule['name']}:{client}"
+
+    _increment(key, window_start, window)
+
+    counts = dict(
+        RateLimitCounter.objects.filter(
+            key=key, window_start__in=[window_start, window_start - window]
+        ).values_list('window_start', 'count')
+    )
+    current = counts.get(window_start, 0)
+    previous = counts.get(window_start - window, 0)
+    estimate = previous * (1 - elapsed / window) + current
+
+    if estimate <= limit:
+        return True, 0
+
+    # Take the request back out; counting first keeps concurrent requests
+    # from all slipping under the limit
+    RateLimitCounter.objects.filter(key=key, window_start=window_start).update(count=F('count') - 1)
+    current -= 1
+
+    # When will the estimate with one more request be back under the limit?
+    if current < limit and previous:
+        # Later in this window, once enough of the previous one has slid out
+        retry_after = (1 - (limit - current - 1) / previous) * window - elapsed
+    else:
+        # In the next window, where this window's count is the one sliding out
+        slide = 1 - (limit - 1) / current if current else 0
+        retry_after = window - elapsed + min(max(slide, 0), 1) * window
+    return False, max(1, math.ceil(retry_after))
@@ -0,0 +1,170 @@
+# core/recommendations.py
+"""
+Turn a generated recommendation report into CropRecommendation and
+RecommendedCrop rows.
+
+Reports are parsed once, when they are saved; views only read the
+structured rows. The expected layout is the one build_recommendation_prompt
+asks for: analysis headings with "-" points, then "Option N" groups of
+"Crop: Name (Local name)" blocks with "- Key: value" details. Lines that
+don't fit the layout are ignored rather than guessed at.
+"""
+import re
+
+from django.db import transaction
+
+from .models import CropRecommendation, RecommendedCrop
+
+# Report heading -> key in CropRecommendation.analysis and its text field
+ANALYSIS_SECTIONS = [
+    ('climate', 'climate_description'),
+    ('soil', 'soil_description'),
+    ('previous crop', 'previous_crop_impact'),
+    ('water', 'water_analysis'),
+]
+
+# "- Key: value" detail of a crop -> RecommendedCrop field
+CROP_DETAILS = [
+    ('season', 'growing_season'),
+    ('maturity', 'maturity'),
+    ('duration', 'maturity'),
+    ('water', 'water_usage'),
+    ('market', 'market_demand'),
+    ('rotation', 'crop_rotation'),
+    ('adaptation', 'local_adaptation'),
+    ('climate', 'climate'),
+]
+
+_MARKUP = re.compile(r'[*_#`]+')
+_BULLET = re.compile(r'^(?:[-•]\s*|\*\s+|\d+[.)]\s+)')
+_OPTION = re.compile(r'^option\s*(\d)', re.IGNORECASE)
+_CROP_LINE = re.compile(r'^crop(?:\s*name)?\s*:', re.IGNORECASE)
+_CROP_NAME = re.compile(r'^crop(?:\s*name)?\s*:\s*(.*)$', re.IGNORECASE)
+_NAME = re.compile(r'^(.+?)(?:\s*\((.+)\))?$')
+
+
+def _clean(line):
+    return _MARKUP.sub('', line).strip()
+
+
+def _analysis_key(heading):
+    heading = heading.lower().rstrip(':')
+    for prefix, field in ANALYSIS_SECTIONS:
+        if heading.startswith(prefix):
+            return field
+    return None
+
+
+def _crop_name(line):
+    """The name after a "Crop:" header; empty when it is on the next line"""
+    return _CROP_NAME.match(line).group(1).strip().rstrip(':').strip()
+
+
+def _new_crop(option, name):
+    """RecommendedCrop fields for a crop written as 'Name (Local name)'"""
+    match = _NAME.match(name)
+    return {
+        'option_number': option,
+        'crop_name': match.group(1).strip()[:100],
+        'local_name': (match.group(2) or '').strip()[:100],
+        'crop_rotation': '',
+        'market_demand': '',
+        'growing_season': '',
+    }
+
+
+def parse_report(text):
+    """
+    Split a report into analysis points and crops.
+
+    Returns (analysis, crops): analysis maps each CropRecommendation text
+    field to its list of points, crops is a list of RecommendedCrop field
+    dicts.
+    """
+    analysis = {}
+    crops = []
+    section = crop = None
+    option = '1'
+    in_crops = False
+    awaiting_name = False  # after a bare "Crop:" header
+
+    for raw in text.splitlines():
+        raw = raw.strip()
+        is_bullet = _BULLET.match(raw) is not None
+        line = _clean(_BULLET.sub('', raw))
+        if not line:
+            continue
+
+        option_match = _OPTION.match(line)
+        if option_match:
+            if option_match.group(1) in ('1', '2'):
+                option = option_match.group(1)
+            in_crops = True
+            section = crop = None
+            awaiting_name = False
+            continue
+
+        if awaiting_name and not is_bullet and not _CROP_LINE.match(line):
+            awaiting_name = False
+            crop = _new_crop(option, line)
+            crops.append(crop)
+        elif _CROP_LINE.match(line):
+            in_crops = True
+            section = crop = None
+            name = _crop_name(line)
+            if name:
+                crop = _new_crop(option, name)
+                crops.append(crop)
+            else:
+                awaiting_name = True
+        elif is_bullet:
+            key, _, value = line.partition(':')
+            if crop is not None:
+                for prefix, field in CROP_DETAILS:
+                    if prefix in key.lower() and value.strip():
+                        crop[field] = value.strip()
+                        break
+            elif section is not None:
+                analysis[section].append(line)
+        elif not in_crops and _analysis_key(line) is not None:
+            section = _analysis_key(line)
+            analysis.setdefault(section, [])
+        elif section is not None:
+            analysis[section].append(line)
+
+    return analysis, crops
+
+
+def build_recommendation(farm, text):
+    """An unsaved CropRecommendation and its unsaved RecommendedCrop rows"""
+    analysis, crops = parse_report(text)
+    if not analysis and not crops:
+        # Nothing recognisable; keep the whole report readable
+        analysis = {'climate_description': [line.strip() for line in text.splitlines() if line.strip()]}
+
+    recommendation = CropRecommendation(
+        farm=farm,
+        analysis=analysis,
+        climate_description='\n'.join(analysis.get('climate_description', [])),
+        soil_description='\n'.join(analysis.get('soil_description', [])),
+        previous_crop_impact='\n'.join(analysis.get('previous_crop_impact', [])),
+        water_analysis='\n'.join(analysis.get('water_analysis', [])) or None,
+    )
+    return recommendation, [RecommendedCrop(**fields) for fields in crops]
+
+
+def save_recommendations(entries):
+    """Save (recommendation, crops) pairs with one bulk insert per table"""
+    with transaction.atomic():
+        recommendations = CropRecommendation.objects.bulk_create([r for r, _ in entries])
+        crops = []
+        for recommendation, recommended in entries:
+            for crop in recommended:
+                crop.recommendation = recommendation
+                crops.append(crop)
+        RecommendedCrop.objects.bulk_create(crops)
+    return recommendations
+
+
+def save_recommendation(farm, text):
+    return save_recommendations([build_recommendation(farm, text)])[0]
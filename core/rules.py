@@ -0,0 +1,235 @@
+# core/rules.py
+"""
+Deterministic crop rules: a fast path in front of Gemini.
+
+Crops in the knowledge base (core/knowledge_base.py) are scored on
+planting month, soil, rotation after the previous crop and region. Standard combinations are answered
+here in microseconds; Gemini is only asked about inputs the tables don't
+cover. Reports use the layout build_recommendation_prompt asks Gemini for,
+so they are saved by the same parser.
+
+Each request runs in one of three modes:
+
+- ``rules``: always answer from the rules (defaults for unknown inputs)
+- ``rules_then_llm``: rules when they cover the input, Gemini otherwise
+- ``llm``: always ask Gemini
+"""
+import threading
+from collections import namedtuple
+from datetime import date
+
+from django.conf import settings
+
+from . import knowledge_base
+from .cache_keys import normalize_text
+from .models import RecommendedCrop
+
+RULES = 'rules'
+RULES_THEN_LLM = 'rules_then_llm'
+LLM = 'llm'
+MODES = (RULES, RULES_THEN_LLM, LLM)
+
+WATER_NOTES = {
+    'high': 'Needs assured irrigation or standing water',
+    'medium': 'Needs regular irrigation at critical stages',
+    'low': 'Grows on residual moisture and light irrigation',
+}
+
+# (water need, sandy soil) -> irrigation interval
+IRRIGATION = {
+    ('high', False): 'every 3 days', ('high', True): 'every 2 days',
+    ('medium', False): 'every 5-7 days', ('medium', True): 'every 4-5 days',
+    ('low', False): 'every 10-12 days', ('low', True): 'every 7-8 days',
+}
+
+SEASON_POINTS = 40
+SEASON_EDGE_POINTS = 20  # a month either side of the window
+SOIL_POINTS = 30
+ROTATION_POINTS = 15
+REGION_POINTS = 15
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+Scored = namedtuple('Scored', 'crop score rotation')
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def resolve_mode(mode):
+    """A valid mode, falling back to settings.GENERATION_MODE"""
+    return mode if mode in MODES else settings.GENERATION_MODE
+
+
+def count_path(kind, path):
+    with _stats_lock:
+        counts = _stats.setdefault(kind, {RULES: 0, LLM: 0})
+        counts[path] += 1
+
+
+def path_stats():
+    """Per generation kind: how many requests the rules and Gemini answered"""
+    with _stats_lock:
+        return {kind: dict(counts) for kind, counts in _stats.items()}
+
+
+def _month_distance(month, months):
+    return min(min(abs(month - m), 12 - abs(month - m)) for m in months)
+
+
+def _rotation(crop, previous):
+    """Points and a one-line note for growing crop after the previous crop"""
+    if previous is None:
+        return ROTATION_POINTS // 2, "No rotation data for the previous crop"
+    if previous is crop:
+        return 0, f"Repeating {crop.name.lower()} builds up its pests and diseases"
+    if crop.family == 'legume' and previous.family != 'legume':
+        return ROTATION_POINTS, f"Restores the nitrogen {previous.name.lower()} took from the soil"
+    if previous.family == 'legume' and crop.family != 'legume':
+        return ROTATION_POINTS, f"Uses the nitrogen left behind by {previous.name.lower()}"
+    if previous.family == crop.family:
+        return ROTATION_POINTS // 3, f"Same crop family as {previous.name.lower()}; shares its pests"
+    return ROTATION_POINTS * 2 // 3, f"Breaks the pest cycle of {previous.name.lower()}"
+
+
+def rank_crops(soil_type, month, previous_crop, location):
+    """Every crop scored 0-100 for these conditions, best first"""
+    soil = normalize_text(soil_type)
+    previous = knowledge_base.crop(previous_crop)
+    zone = knowledge_base.zone_for(location)
+    ranked = []
+    for crop in knowledge_base.get().crops.values():
+        distance = _month_distance(month, crop.sowing_months)
+        score = SEASON_POINTS if distance == 0 else SEASON_EDGE_POINTS if distance == 1 else 0
+        score += SOIL_POINTS if soil in crop.soils else 0
+        rotation_points, rotation = _rotation(crop, previous)
+        score += rotation_points
+        if zone is None:
+            score += REGION_POINTS // 2
+        elif zone in crop.zones:
+            score += REGION_POINTS
+        ranked.append(Scored(crop, score, rotation))
+    ranked.sort(key=lambda scored: -scored.score)
+    return ranked
+
+
+def covers(soil_type, ranked):
+    """Whether the rules are confident enough to answer without Gemini"""
+    good = [scored for scored in ranked if scored.score >= settings.RULES_MIN_SCORE]
+    return normalize_text(soil_type) in knowledge_base.get().soils and len(good) >= 2
+
+
+def _crop_lines(scored, month):
+    crop = scored.crop
+    in_season = month in crop.sowing_months
+    return [
+        f"Crop: {crop.name} ({crop.local_name})",
+        f"- Growing Season: {crop.season}",
+        f"- Maturity: {crop.duration_days} days",
+        f"- Water Usage: {WATER_NOTES[crop.water]}",
+        f"- Market Demand: {crop.market}",
+        f"- Crop Rotation: {scored.rotation}",
+        f"- Local Adaptation: Rule score {scored.score}/100",
+        f"- Climate: {'In' if in_season else 'Outside'} its usual sowing window for {MONTHS[month - 1]}",
+    ]
+
+
+def recommendation_report(farm, ranked, month):
+    """A recommendation report for the farm from ranked crops, in the prompt's layout"""
+    zone = knowledge_base.zone_for(farm.location)
+    best = ranked[0]
+    previous = knowledge_base.crop(farm.previous_crop)
+    suited = [scored.crop.name for scored in ranked if normalize_text(farm.soil_type) in scored.crop.soils]
+
+    lines = ["Climate Analysis:"]
+    lines.append(f"- {knowledge_base.get().zone_climates[zone]}" if zone else "- Region not in the rule tables; using all-India seasons")
+    lines.append(f"- Sowing in {MONTHS[month - 1]}")
+    lines.append("Soil Analysis:")
+    lines.append(f"- {farm.soil_type.title()} soil suits {', '.join(suited[:6]) or 'few of the listed crops'}")
+    lines.append("Previous Crop Impact:")
+    if previous is None:
+        lines.append(f"- No rotation data for {farm.previous_crop}")
+    else:
+        lines.append(f"- {previous.name} is a {previous.family} crop; {best.rotation.lower()}")
+    lines.append("Water Availability:")
+    lines.append(f"- {best.crop.name}: {WATER_NOTES[best.crop.water].lower()}")
+
+    # The two options the UI shows (RecommendedCrop.OPTION_CHOICES): the
+    # best pulses, then the best of the other crops
+    pulses = [scored for scored in ranked if scored.crop.family == 'legume']
+    others = [scored for scored in ranked if scored.crop.family != 'legume']
+    for (_, label), group in zip(RecommendedCrop.OPTION_CHOICES, (pulses, others)):
+        lines.append(label)
+        for scored in group[:2]:
+            lines.extend(_crop_lines(scored, month))
+    return '\n'.join(lines)
+
+
+def plan_skeleton(crop_name, planting_date, soil_type):
+    """A daily plan sized to the crop's duration and water needs; None for unknown crops"""
+    crop = knowledge_base.crop(crop_name)
+    if crop is None:
+        return None
+    if isinstance(planting_date, str):
+        planting_date = date.fromisoformat(planting_date)
+
+    name = crop.name.lower()
+    growing = crop.duration_days - 12  # after land preparation and planting
+    initial = round(growing * 0.3)
+    pre_harvest = max(7, round(growing * 0.1))
+    main = growing - initial - pre_harvest
+    sandy = 'sandy' in normalize_text(soil_type)
+    # Legumes fix their own nitrogen
+    top_dressing = 'Phosphorus' if crop.family == 'legume' else 'Nitrogen'
+    notes = [
+        WATER_NOTES[crop.water],
+        f"Adjust frequency to {soil_type} soil moisture and rainfall",
+    ]
+    if planting_date.month not in crop.sowing_months:
+        notes.append(f"Sown outside the usual {crop.season} window; expect more irrigation and lower yield")
+
+    return {
+        'phases': [
+            {'name': 'Land Preparation', 'duration': '7 days', 'tasks': [
+                "Clear the field of previous crop residue",
+                "Test soil pH and nutrient levels",
+                f"Prepare a fine seedbed for {name} in {soil_type} soil",
+                "Apply basal fertilizer based on the soil test",
+            ]},
+            {'name': 'Planting', 'duration': '5 days', 'tasks': [
+                f"Treat {name} seed before sowing",
+                "Sow at the recommended spacing and depth",
+                "Irrigate lightly after sowing",
+            ]},
+            {'name': 'Initial Growth', 'duration': f"{initial} days", 'tasks': [
+                "Check emergence and fill gaps",
+                "Weed at 20-25 days",
+                "Watch for early pests and diseases",
+            ]},
+            {'name': 'Main Growth Period', 'duration': f"{main} days", 'tasks': [
+                f"Irrigate {IRRIGATION[crop.water, sandy]}",
+                f"Top-dress {top_dressing.lower()} at the critical stage",
+                "Scout weekly for pests and diseases",
+            ]},
+            {'name': 'Pre-Harvest', 'duration': f"{pre_harvest} days", 'tasks': [
+                "Stop irrigation as the crop matures",
+                "Check maturity indicators",
+                "Arrange labour, equipment and storage",
+            ]},
+        ],
+        'irrigation_schedule': {
+            'frequency': IRRIGATION[crop.water, sandy],
+            'amount': 'Based on soil moisture levels and weather conditions',
+            'notes': notes,
+        },
+        'fertilizer_schedule': [
+            {'timing': 'At planting', 'type': 'Basal NPK', 'amount': 'As per soil test recommendations'},
+            {'timing': f"{12 + initial} days after planting", 'type': f"{top_dressing} top dressing",
+             'amount': 'Based on crop development'},
+        ],
+        'monitoring_points': [
+            "Daily visual inspection for the first 10 days",
+            "Weekly pest and disease scouting",
+            "Soil moisture before each irrigation",
+        ],
+    }
@@ -0,0 +1,153 @@
+# core/schemas.py
+"""
+Response schemas for Gemini's structured output mode.
+
+Each schema is written once, in the OpenAPI subset Gemini accepts as
+`response_schema`, and the same dict drives validation of what comes
+back: parse_structured() checks types, required keys, enums and list
+bounds and returns plain dicts ready to store.
+"""
+import json
+
+
+class SchemaError(ValueError):
+    """A model response that is not valid JSON or does not match its schema"""
+
+
+def _string(**extra):
+    return {'type': 'string', **extra}
+
+
+def _integer():
+    return {'type': 'integer'}
+
+
+def _list(items, min_items=None):
+    schema = {'type': 'array', 'items': items}
+    if min_items is not None:
+        schema['min_items'] = min_items
+    return schema
+
+
+def _object(properties, optional=()):
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': [name for name in properties if name not in optional],
+    }
+
+
+CROP_PLAN_SCHEMA = _object({
+    'phases': _list(_object({
+        'name': _string(),
+        'duration_days': _integer(),
+        'tasks': _list(_string(), min_items=1),
+    }), min_items=1),
+    'irrigation_schedule': _object({
+        'frequency': _string(),
+        'amount': _string(),
+        'notes': _list(_string()),
+    }, optional=('notes',)),
+    'fertilizer_schedule': _list(_object({
+        'timing': _string(),
+        'type': _string(),
+        'amount': _string(),
+    })),
+    'monitoring_points': _list(_string()),
+})
+
+PESTICIDE_SCHEMA = _object({
+    'recommendations': _list(_object({
+        'name': _string(),
+        'type': _string(enum=['organic', 'chemical']),
+        'target': _string(),
+        'application': _string(),
+        'safety_precautions': _list(_string(), min_items=1),
+    }), min_items=1),
+    'general_guidelines': _list(_string()),
+    'emergency_contacts': _list(_string()),
+})
+
+CROP_RECOMMENDATION_SCHEMA = _object({
+    'recommended_crops': _list(_object({
+        'name': _string(),
+        'confidence': _integer(),
+        'reason': _string(),
+    }), min_items=1),
+})
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool,
+}
+
+
+def validate(schema, value, path='$'):
+    """Raise SchemaError unless value matches schema"""
+    if value is None:
+        if schema.get('nullable'):
+            return
+        raise SchemaError(f"{path}: missing value")
+
+    expected = _TYPES[schema['type']]
+    # bool is an int subclass; don't let true pass as a number
+    if not isinstance(value, expected) or (isinstance(value, bool) and schema['type'] != 'boolean'):
+        raise SchemaError(f"{path}: expected {schema['type']}, got {type(value).__name__}")
+
+    if 'enum' in schema and value not in schema['enum']:
+        raise SchemaError(f"{path}: {value!r} is not one of {schema['enum']}")
+
+    if schema['type'] == 'object':
+        for name in schema.get('required', []):
+            if name not in value:
+                raise SchemaError(f"{path}.{name}: required")
+        for name, subschema in schema.get('properties', {}).items():
+            if name in value:
+                validate(subschema, value[name], f"{path}.{name}")
+
+    elif schema['type'] == 'array':
+        if len(value) < schema.get('min_items', 0):
+            raise SchemaError(f"{path}: expected at least {schema['min_items']} item(s)")
+        if 'max_items' in schema and len(value) > schema['max_items']:
+            raise SchemaError(f"{path}: expected at most {schema['max_items']} item(s)")
+        for i, item in enumerate(value):
+            validate(schema['items'], item, f"{path}[{i}]")
+
+
+def strip_fences(text):
+    """Remove a ```json ... ``` markdown fence around a response, if any"""
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        if text.rstrip().endswith('```'):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def parse_structured(text, schema):
+    """Decode a JSON response and validate it against schema"""
+    try:
+        data = json.loads(strip_fences(text))
+    except (TypeError, ValueError) as e:
+        raise SchemaError(f"invalid JSON: {e}") from None
+    validate(schema, data)
+    return data
+
+
+def crop_plan_from_response(data):
+    """The daily_plan dict CropPlan stores, from a validated crop plan response"""
+    return {
+        **data,
+        'phases': [
+            {
+                'name': phase['name'],
+                'duration': f"{max(phase['duration_days'], 1)} days",
+                'tasks': phase['tasks'],
+            }
+            for phase in data['phases']
+        ],
+    }
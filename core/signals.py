@@ -0,0 +1,29 @@
+# core/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .dashboard import forget_farm, invalidate
+from .models import CropPlan, Farm, MonitoringSchedule, PestAlert
+
+
+@receiver([post_save, post_delete], sender=CropPlan)
+@receiver([post_save, post_delete], sender=PestAlert)
+def invalidate_farm_dashboard(sender, instance, **kwargs):
+    invalidate(instance.farm_id)
+
+
+@receiver([post_save, post_delete], sender=MonitoringSchedule)
+def invalidate_plan_dashboard(sender, instance, **kwargs):
+    if MonitoringSchedule.crop_plan.is_cached(instance):
+        farm_id = instance.crop_plan.farm_id
+    else:
+        farm_id = CropPlan.objects.filter(id=instance.crop_plan_id).values_list(
+            'farm_id', flat=True
+        ).first()
+    if farm_id is not None:
+        invalidate(farm_id)
+
+
+@receiver([post_save, post_delete], sender=Farm)
+def invalidate_user_farm(sender, instance, **kwargs):
+    forget_farm(instance.user_id)
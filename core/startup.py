@@ -0,0 +1,54 @@
+# core/startup.py
+"""
+Warm-up for serving processes.
+
+Loads what the first requests would otherwise pay for: compiled templates,
+the monitoring templates, the knowledge base and the Gemini client. Run
+from CoreConfig.ready() when settings.WARM_UP_ON_STARTUP is set, which
+the WSGI/ASGI entry points turn on; manage.py commands and tests skip it.
+"""
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+from django.template.loader import get_template
+
+from . import knowledge_base, llm_client
+from .monitoring import monitoring_templates
+
+logger = logging.getLogger(__name__)
+
+
+def load_templates():
+    """Compile the project's own templates into the cached loader; admin ones are left lazy"""
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory)
+            if not directory.is_relative_to(settings.BASE_DIR):
+                continue
+            for path in directory.rglob('*.html'):
+                get_template(path.relative_to(directory).as_posix(), using=engine.name)
+
+
+STEPS = [
+    ('templates', load_templates),
+    ('monitoring_templates', lambda: monitoring_templates.get('default')),
+    ('knowledge_base', knowledge_base.get),
+    ('llm_client', llm_client.genai),
+]
+
+
+def warm_up():
+    """Run each warm-up step; returns seconds taken per step"""
+    timings = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            # A failed warm-up only means the first request does the work
+            logger.warning("Warm-up step %s failed", name, exc_info=True)
+        timings[name] = time.perf_counter() - started
+    return timings
@@ -0,0 +1,25 @@
+# core/test_runner.py
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from .benchmarks import FILE_CACHE
+
+
+class TestRunner(DiscoverRunner):
+    """The default runner, with the shared cache replaced by an empty temporary one"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='superagri-test-cache-')
+        self.cache_settings = override_settings(
+            CACHES={'default': {'BACKEND': FILE_CACHE, 'LOCATION': self.cache_dir}}
+        )
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,1105 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    CropPlan, CropRecommendation, Farm, GenerationJob, MonitoringSchedule, PestAlert, PlanDocument,
+    LLMResponse, RateLimitCounter, RecommendedCrop
+)
+from . import dashboard, jobs, knowledge_base, llm_store, ratelimit, rules
+from .fake_gemini import FakeGeminiModel, installed
+from .monitoring import MonitoringTemplateRegistry, complete_occurrence, save_plan_with_schedule
+from .cache_keys import farm_recommendation_key, hit_ratios
+from .recommendations import parse_report, save_recommendation
+from .startup import warm_up
+from .schemas import CROP_PLAN_SCHEMA, PESTICIDE_SCHEMA, SchemaError, parse_structured, validate
+from .utils import (
+    aget_cached_or_generate,
+    generate_crop_plan,
+    generate_json,
+    generate_recommendation_text,
+    get_cached_or_generate,
+    get_default_pesticide_recommendations,
+    get_pesticide_recommendations,
+    validate_crop_season,
+    validate_soil_requirements,
+)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Each core view renders in a fixed number of queries, however much data
+    the farm has. Every logged-in request also spends two queries loading
+    the session and the user.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('farmer', password='pw')
+        cls.farm = Farm.objects.create(
+            user=cls.user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice'
+        )
+        other = User.objects.create_user('neighbour', password='pw')
+        cls.other_farm = Farm.objects.create(
+            user=other, location='Nellore', total_area=3, soil_type='clay', previous_crop='cotton'
+        )
+        cls.add_history(cls.farm, plans=3)
+        cls.add_history(cls.other_farm, plans=2)
+        cls.plan = CropPlan.objects.filter(farm=cls.farm).first()
+
+    @classmethod
+    def add_history(cls, farm, plans):
+        today = date.today()
+        for i in range(plans):
+            plan = save_plan_with_schedule(CropPlan(
+                farm=farm, crop_name='wheat', planting_date=today - timedelta(days=i % 3 * 10),
+                harvest_date=today + timedelta(days=90), monitoring_frequency='weekly',
+                daily_plan={'phases': [{'name': 'Sowing', 'duration': '7 days', 'tasks': ['Sow']}]},
+            ))
+            recurrence = plan.recurrences.order_by('-end_date').first()
+            complete_occurrence(recurrence, next(recurrence.occurrence_dates(today)), 'done')
+            MonitoringSchedule.objects.create(
+                crop_plan=plan, date=today + timedelta(days=i), task_type='soil_test',
+                description='Send soil sample to the lab'
+            )
+            PestAlert.objects.create(
+                farm=farm, pest_name='Aphids', risk_level='low',
+                description='Spotted on leaves', recommended_action='Spray neem oil'
+            )
+            recommendation = CropRecommendation.objects.create(
+                farm=farm, climate_description='Warm', soil_description='Loamy',
+                previous_crop_impact='Low nitrogen'
+            )
+            for option in '12':
+                RecommendedCrop.objects.create(
+                    recommendation=recommendation, option_number=option, crop_name='Chickpea',
+                    local_name='Chana', crop_rotation='Good', market_demand='High',
+                    growing_season='Rabi'
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def assertBudget(self, budget, url, method='get', status=200, **kwargs):
+        with self.assertNumQueries(budget):
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def test_farm_details(self):
+        self.assertBudget(3, reverse('core:farm_details'))
+
+    def test_crop_plan_form(self):
+        self.assertBudget(3, reverse('core:crop_plan'))
+
+    def test_plan_detail(self):
+        self.assertBudget(3, reverse('core:plan_detail', args=[self.plan.id]))
+
+    def test_plan_detail_of_another_farm(self):
+        plan = CropPlan.objects.filter(farm=self.other_farm).first()
+        self.assertBudget(3, reverse('core:plan_detail', args=[plan.id]), status=302)
+
+    def test_view_recommendations(self):
+        response = self.assertBudget(4, reverse('core:view_recommendations'))
+        self.assertEqual(response.context['farm'], self.farm)
+        self.assertEqual(len(response.context['crops']), 2)
+
+    def test_view_recommendations_without_any(self):
+        CropRecommendation.objects.filter(farm=self.farm).delete()
+        response = self.assertBudget(4, reverse('core:view_recommendations'))
+        self.assertIsNone(response.context['recommendation'])
+
+    def test_monitoring_dashboard(self):
+        response = self.assertBudget(7, reverse('core:monitoring_dashboard'))
+        self.assertEqual(len(response.context['schedules']), 10)
+        self.assertEqual(len(response.context['pest_alerts']), 3)
+
+    def test_monitoring_dashboard_does_not_grow_with_data(self):
+        self.add_history(self.farm, plans=20)
+        self.assertBudget(7, reverse('core:monitoring_dashboard'))
+
+    def test_monitoring_dashboard_served_from_cache(self):
+        self.client.get(reverse('core:monitoring_dashboard'))
+        response = self.assertBudget(2, reverse('core:monitoring_dashboard'))
+        self.assertContains(response, 'Spray neem oil')
+
+    def test_completing_a_task_refreshes_the_dashboard(self):
+        response = self.client.get(reverse('core:monitoring_dashboard'))
+        task = next(t for t in response.context['schedules'] if t.id is not None)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('core:complete_task', args=[task.id]))
+        # Everything but the cached farm id is reloaded
+        response = self.assertBudget(6, reverse('core:monitoring_dashboard'))
+        self.assertNotIn(task.id, [t.id for t in response.context['schedules']])
+
+    def test_resolving_an_alert_refreshes_the_dashboard(self):
+        self.client.get(reverse('core:monitoring_dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            for alert in PestAlert.objects.filter(farm=self.farm):
+                alert.resolved = True
+                alert.save()
+        response = self.client.get(reverse('core:monitoring_dashboard'))
+        self.assertContains(response, 'No active pest alerts.')
+
+    def test_monitoring_dashboard_without_farm(self):
+        Farm.objects.filter(user=self.user).delete()
+        self.assertBudget(3, reverse('core:monitoring_dashboard'), status=302)
+
+    def test_complete_task(self):
+        task = MonitoringSchedule.objects.filter(crop_plan=self.plan, recurrence__isnull=True).first()
+        self.assertBudget(
+            4, reverse('core:complete_task', args=[task.id]), method='post', status=302,
+            data={'notes': 'ok'}
+        )
+        task.refresh_from_db()
+        self.assertTrue(task.completed)
+
+    def test_complete_task_of_another_farm(self):
+        task = MonitoringSchedule.objects.filter(crop_plan__farm=self.other_farm).first()
+        self.assertBudget(3, reverse('core:complete_task', args=[task.id]), method='post', status=404)
+
+    def test_complete_recurring_task(self):
+        recurrence = self.plan.recurrences.last()
+        day = recurrence.end_date
+        self.assertBudget(
+            4, reverse('core:complete_recurring_task', args=[recurrence.id, day.isoformat()]),
+            method='post', status=302
+        )
+        self.assertTrue(MonitoringSchedule.objects.get(recurrence=recurrence, date=day).completed)
+
+    def test_complete_tasks_batch(self):
+        own = list(MonitoringSchedule.objects.filter(
+            crop_plan__farm=self.farm, recurrence__isnull=True, completed=False
+        ).values_list('id', flat=True))
+        foreign = MonitoringSchedule.objects.filter(crop_plan__farm=self.other_farm).first()
+        recurrence = self.plan.recurrences.last()
+        tasks = [{'id': task_id, 'notes': f'note {task_id}'} for task_id in own] + [
+            {'id': foreign.id},
+            {'recurrence_id': recurrence.id, 'date': recurrence.end_date.isoformat()},
+            {'recurrence_id': recurrence.id, 'date': '2001-01-01'},
+        ]
+        # session, user, savepoint, owned ids, UPDATE, recurrences, upsert, release
+        response = self.assertBudget(
+            8, reverse('core:complete_tasks_batch'), method='post',
+            data=json.dumps({'tasks': tasks}), content_type='application/json'
+        )
+        result = response.json()
+        self.assertEqual(len(result['completed']), len(own) + 1)
+        self.assertEqual(result['rejected'], [
+            {'id': foreign.id}, {'recurrence_id': recurrence.id, 'date': '2001-01-01'}
+        ])
+        for task in MonitoringSchedule.objects.filter(id__in=own):
+            self.assertEqual((task.completed, task.notes), (True, f'note {task.id}'))
+        foreign.refresh_from_db()
+        self.assertFalse(foreign.completed)
+        self.assertTrue(MonitoringSchedule.objects.get(recurrence=recurrence, date=recurrence.end_date).completed)
+
+    def test_complete_tasks_batch_rejects_bad_input(self):
+        response = self.client.post(
+            reverse('core:complete_tasks_batch'), data=json.dumps({'tasks': [{'date': 'soon'}]}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(GENERATION_USE_JOB_QUEUE=True)
+    def test_job_pages(self):
+        job = GenerationJob.objects.create(user=self.user, kind='recommendation')
+        self.assertBudget(3, reverse('core:job_detail', args=[job.id]))
+        self.assertBudget(3, reverse('core:job_status', args=[job.id]))
+
+
+REPORT = """Here is my analysis.
+
+**Climate Analysis:**
+*   Hot, humid summers
+*   Reliable monsoon
+Soil Analysis:
+- Loam holds moisture well
+Previous Crop Impact:
+- Rice leaves low nitrogen
+Water Availability:
+- Canal water from June
+
+Option 1: Focus on Pulses
+Crop: Chickpea (Chana)
+- Growing Season: Rabi
+- Maturity: 95 days
+- Water Usage: Low
+- Market Demand: Steady local demand
+- Crop Rotation: Restores nitrogen after rice
+Option 2: Diversified Approach
+Crop: **Maize** (Makka)
+- Growing Season: Kharif
+- Market Demand: Poultry feed
+"""
+
+
+class RecommendationParsingTests(TestCase):
+    def test_report_is_saved_as_structured_rows(self):
+        user = User.objects.create_user('farmer')
+        farm = Farm.objects.create(
+            user=user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice'
+        )
+        with self.assertNumQueries(4):  # savepoint, two bulk inserts, release
+            recommendation = save_recommendation(farm, REPORT)
+
+        self.assertEqual(
+            recommendation.analysis['climate_description'], ['Hot, humid summers', 'Reliable monsoon']
+        )
+        self.assertEqual(recommendation.water_analysis, 'Canal water from June')
+        chickpea, maize = recommendation.crops.all()
+        self.assertEqual(
+            (chickpea.option_number, chickpea.crop_name, chickpea.local_name, chickpea.maturity),
+            ('1', 'Chickpea', 'Chana', '95 days')
+        )
+        self.assertEqual((maize.option_number, maize.crop_name, maize.market_demand), ('2', 'Maize', 'Poultry feed'))
+
+    def test_crop_name_on_the_line_after_a_bare_header(self):
+        analysis, crops = parse_report(
+            "Option 1: Pulses\n**Crop:**\nChickpea (Chana)\n- Growing Season: Rabi\n"
+            "Option 2: Others\nCrop:\n- Market Demand: High\nCrop: Maize\n"
+        )
+        self.assertEqual(
+            [(crop['option_number'], crop['crop_name'], crop['local_name']) for crop in crops],
+            [('1', 'Chickpea', 'Chana'), ('2', 'Maize', '')]
+        )
+        self.assertEqual(crops[0]['growing_season'], 'Rabi')
+
+    def test_unstructured_report_is_kept_readable(self):
+        user = User.objects.create_user('farmer')
+        farm = Farm.objects.create(
+            user=user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice'
+        )
+        recommendation = save_recommendation(farm, "Grow millets.\nThey need little water.")
+        self.assertEqual(recommendation.climate_description, "Grow millets.\nThey need little water.")
+        self.assertFalse(recommendation.crops.exists())
+
+
+@override_settings(LLM_RESPONSE_STORE={'ENABLED': False})
+class CacheKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_place_spellings_share_one_key(self):
+        key = farm_recommendation_key('Guntur', 'loam', 'Paddy', 5)
+        self.assertEqual(farm_recommendation_key('Guntur, AP', 'loam', 'rice', '5.00'), key)
+        self.assertEqual(farm_recommendation_key(' guntur district', 'loam', 'rice', 5), key)
+        self.assertNotEqual(farm_recommendation_key('Guntur', 'clay', 'rice', 5), key)
+
+    def test_recommendations_for_both_spellings_share_one_generation(self):
+        user = User.objects.create_user('farmer')
+        farms = [
+            Farm.objects.create(user=user, location=location, total_area=5, soil_type='loam', previous_crop='rice')
+            for location in ('Guntur', 'Guntur, AP')
+        ]
+        before = hit_ratios().get('recommendation', {'hits': 0, 'misses': 0})
+        with mock.patch('core.utils.generate_text', return_value='Grow chickpea.') as generate_text:
+            texts = [generate_recommendation_text(farm, rules.LLM) for farm in farms]
+        self.assertEqual(texts, ['Grow chickpea.'] * 2)
+        generate_text.assert_called_once()
+
+        counts = hit_ratios()['recommendation']
+        self.assertEqual((counts['hits'] - before['hits'], counts['misses'] - before['misses']), (1, 1))
+        staff = User.objects.create_user('admin', is_staff=True)
+        self.client.force_login(staff)
+        body = self.client.get(reverse('core:metrics')).content.decode()
+        self.assertIn('superagri_cache_hit_ratio{family="recommendation"}', body)
+
+
+class PlanDocumentTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('farmer')
+        self.farm = Farm.objects.create(
+            user=user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice'
+        )
+
+    def make_plan(self, **fields):
+        return CropPlan(
+            farm=self.farm, crop_name='wheat', planting_date=date.today(),
+            harvest_date=date.today() + timedelta(days=90), monitoring_frequency='weekly', **fields
+        )
+
+    def test_identical_plans_share_one_document(self):
+        daily_plan = {'phases': [{'name': 'Sowing', 'duration': '7 days', 'tasks': ['Sow']}]}
+        first = self.make_plan(daily_plan=daily_plan)
+        first.save()
+        # Key order doesn't matter
+        second = self.make_plan(daily_plan=json.loads(json.dumps(daily_plan, sort_keys=True)))
+        third = self.make_plan(daily_plan=daily_plan, pesticides=PESTICIDES)
+        CropPlan.store_documents([second, third])
+        CropPlan.objects.bulk_create([second, third])
+
+        self.assertEqual(PlanDocument.objects.count(), 2)
+        self.assertEqual({first.daily_plan_doc_id, second.daily_plan_doc_id, third.daily_plan_doc_id},
+                         {first.daily_plan_doc_id})
+        plan = CropPlan.objects.get(pk=third.pk)
+        self.assertEqual((plan.daily_plan, plan.pesticides), (daily_plan, PESTICIDES))
+
+    def test_empty_documents_are_not_stored(self):
+        plan = self.make_plan()
+        plan.save()
+        self.assertEqual((plan.daily_plan, plan.pesticides), ({}, {}))
+        self.assertFalse(PlanDocument.objects.exists())
+
+    def test_unused_documents_are_purged(self):
+        kept = self.make_plan(daily_plan={'phases': ['kept']}, pesticides=PESTICIDES)
+        kept.save()
+        replaced = self.make_plan(daily_plan={'phases': ['kept']}, pesticides={'recommendations': ['old']})
+        replaced.save()
+        replaced.pesticides = {'recommendations': ['new']}
+        replaced.save()
+        deleted = self.make_plan(daily_plan={'phases': ['deleted']})
+        deleted.save()
+        deleted.delete()
+        PlanDocument.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        # Stored by a plan that is being saved right now
+        CropPlan.store_documents([self.make_plan(pesticides={'recommendations': ['just stored']})])
+
+        out = StringIO()
+        call_command('purge_plan_documents', stdout=out)
+        self.assertIn('Deleted 2 unused plan document(s)', out.getvalue())
+        self.assertEqual(
+            sorted(PlanDocument.objects.values_list('content', flat=True), key=json.dumps),
+            sorted([{'phases': ['kept']}, PESTICIDES, {'recommendations': ['new']},
+                    {'recommendations': ['just stored']}], key=json.dumps),
+        )
+
+    def test_purge_keeps_documents_a_save_is_storing_again(self):
+        old = self.make_plan(pesticides=PESTICIDES)
+        old.save()
+        old.delete()
+        PlanDocument.objects.update(created_at=timezone.now() - timedelta(hours=2))
+
+        # A new plan stores the same content; the plan row isn't written yet
+        CropPlan.store_documents([self.make_plan(pesticides=PESTICIDES)])
+        self.assertEqual(PlanDocument.delete_orphans(), 0)
+        PlanDocument.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(PlanDocument.delete_orphans(batch_size=1), 1)
+        self.assertFalse(PlanDocument.objects.exists())
+
+
+class RuleEngineTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('farmer')
+        self.farm = Farm.objects.create(
+            user=user, location='Guntur, AP', total_area=5, soil_type='loam', previous_crop='rice'
+        )
+
+    def test_standard_farm_is_answered_by_the_rules(self):
+        before = rules.path_stats().get('recommendation', {}).get('rules', 0)
+        with mock.patch('core.utils.get_gemini_model', side_effect=AssertionError('Gemini called')):
+            recommendation = save_recommendation(self.farm, generate_recommendation_text(self.farm))
+
+        self.assertEqual(rules.path_stats()['recommendation']['rules'], before + 1)
+        self.assertIn('coastal', recommendation.climate_description)
+        crops = recommendation.crops.all()
+        self.assertEqual([crop.option_number for crop in crops], ['1', '1', '2', '2'])
+        self.assertEqual(crops[0].get_option_number_display(), 'Option 1: Focus on Pulses')
+        self.assertEqual(knowledge_base.crop(crops[0].crop_name).family, 'legume')
+        self.assertIn('Option 2: Diversified Approach', generate_recommendation_text(self.farm))
+
+    def test_uncovered_soil_goes_to_gemini(self):
+        self.farm.soil_type = 'peat'
+        with mock.patch('core.utils.generate_text', return_value='Grow rice.') as generate_text:
+            self.assertEqual(generate_recommendation_text(self.farm), 'Grow rice.')
+            generate_text.assert_called_once()
+            self.assertIsNotNone(generate_recommendation_text(self.farm, mode=rules.RULES))
+            self.assertEqual(generate_text.call_count, 1)
+
+    def test_crop_plan_modes(self):
+        plan = generate_crop_plan('Paddy', '2026-07-01', 'clay', mode=rules.RULES)
+        self.assertEqual(sum(int(phase['duration'].split()[0]) for phase in plan['phases']), 120)
+        # Unknown crops get the generic plan in rules mode
+        plan = generate_crop_plan('dragon fruit', '2026-07-01', 'clay', mode=rules.RULES)
+        self.assertEqual(plan['phases'][0]['name'], 'Land Preparation')
+
+        with mock.patch('core.utils.get_cached_or_generate', return_value={'phases': []}) as llm:
+            self.assertEqual(generate_crop_plan('wheat', '2026-11-01', 'loam', mode=rules.LLM), {'phases': []})
+            generate_crop_plan('wheat', '2026-11-01', 'loam')
+            self.assertEqual(llm.call_count, 1)
+
+
+class KnowledgeBaseTests(TestCase):
+    def test_lookups(self):
+        self.assertEqual(knowledge_base.crop('Chana').name, 'Chickpea')
+        self.assertEqual(knowledge_base.zone_for('Guntur district'), 'coastal')
+        self.assertEqual(knowledge_base.zone_for('Somewhere, Punjab'), 'northern')
+        validate_soil_requirements('paddy', 'Clay')
+        with self.assertRaisesMessage(ValidationError, 'rice typically grows best in'):
+            validate_soil_requirements('rice', 'sandy')
+        with self.assertRaisesMessage(ValidationError, 'planted in months: 10, 11, 12'):
+            validate_crop_season('wheat', date(2026, 5, 1))
+
+    def test_validator_data_matches_the_original_tables(self):
+        """The season and soil checks crop_plan ran before the knowledge base existed"""
+        seasons = {'rice': (6, 7, 8), 'wheat': (10, 11, 12), 'corn': (3, 4, 5)}
+        soils = {'rice': ('clay', 'loam'), 'wheat': ('loam', 'sandy loam'), 'corn': ('loam', 'sandy loam', 'silt')}
+        for name in seasons:
+            crop = knowledge_base.crop(name)
+            self.assertEqual((crop.sowing_months, crop.soils), (seasons[name], soils[name]))
+        with self.assertRaises(ValidationError):
+            validate_soil_requirements('rice', 'silt')
+        with self.assertRaises(ValidationError):
+            validate_crop_season('corn', date(2026, 7, 1))
+
+    def test_default_pesticides_match_the_response_schema(self):
+        for stage in knowledge_base.get().stages + ('unknown',):
+            for crop in ['mango', 'wheat']:
+                validate(PESTICIDE_SCHEMA, get_default_pesticide_recommendations(crop, stage))
+
+    def test_unsupported_data_version_is_rejected(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for path in knowledge_base.KNOWLEDGE_BASE_DIR.iterdir():
+                shutil.copy(path, directory)
+            with open(os.path.join(directory, 'crops.json')) as f:
+                crops = json.load(f)
+            with open(os.path.join(directory, 'crops.json'), 'w') as f:
+                json.dump({**crops, 'version': 2}, f)
+            with self.assertRaisesMessage(ValueError, 'crops.json: unsupported version 2'):
+                knowledge_base.load(directory)
+
+
+class StartupTests(TestCase):
+    def test_google_client_is_imported_lazily(self):
+        code = (
+            "import sys, django; django.setup(); import smart_agri.urls; "
+            "print('google.generativeai' in sys.modules)"
+        )
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'smart_agri.settings', 'DJANGO_WARM_UP': '0'}
+        result = subprocess.run(
+            [sys.executable, '-c', code], env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), 'False')
+
+
+    def test_failed_warm_up_steps_are_logged(self):
+        steps = [('broken', mock.Mock(side_effect=RuntimeError('no network'))), ('fine', mock.Mock())]
+        with mock.patch('core.startup.STEPS', steps), self.assertLogs('core.startup', 'WARNING') as logs:
+            timings = warm_up()
+        self.assertEqual(set(timings), {'broken', 'fine'})
+        self.assertIn('Warm-up step broken failed', logs.output[0])
+        self.assertIn('RuntimeError: no network', logs.output[0])
+
+PESTICIDES = {
+    'recommendations': [{
+        'name': 'Neem Oil', 'type': 'organic', 'target': 'Aphids',
+        'application': 'Every 7 days', 'safety_precautions': ['Wear gloves'],
+    }],
+    'general_guidelines': ['Read the label'],
+    'emergency_contacts': ['Extension office'],
+}
+
+
+class FakeModel:
+    """Returns the given replies in order and records the prompts it was sent"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return mock.Mock(text=self.replies.pop(0))
+
+
+@override_settings(LLM_RESPONSE_STORE={'ENABLED': False})
+class StructuredOutputTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def generate(self, *replies):
+        model = FakeModel(*replies)
+        with mock.patch('core.utils.get_gemini_model', return_value=model):
+            return generate_json('Pesticides for wheat', PESTICIDE_SCHEMA), model
+
+    def test_markdown_fence_is_stripped(self):
+        text = '```json\n' + json.dumps(PESTICIDES) + '\n```'
+        self.assertEqual(parse_structured(text, PESTICIDE_SCHEMA), PESTICIDES)
+
+    def test_schema_violation_names_the_field(self):
+        broken = {**PESTICIDES, 'recommendations': [{**PESTICIDES['recommendations'][0], 'type': 'magic'}]}
+        with self.assertRaisesMessage(SchemaError, '$.recommendations[0].type'):
+            parse_structured(json.dumps(broken), PESTICIDE_SCHEMA)
+
+    def test_invalid_reply_is_retried_with_the_error(self):
+        empty = {**PESTICIDES, 'recommendations': []}
+        data, model = self.generate(json.dumps(empty), json.dumps(PESTICIDES))
+        self.assertEqual(data, PESTICIDES)
+        self.assertEqual(len(model.prompts), 2)
+        self.assertIn('expected at least 1 item', model.prompts[1])
+
+    def test_falls_back_to_defaults_after_repeated_failures(self):
+        model = FakeModel('not json', 'still not json', '{}')
+        with mock.patch('core.utils.get_gemini_model', return_value=model), \
+                self.assertLogs('core.utils', 'WARNING') as logs:
+            result = get_pesticide_recommendations('mango', 'initial')
+        self.assertEqual(len(model.prompts), 3)
+        self.assertIn('Error generating pesticide recommendations', logs.output[0])
+        self.assertEqual(result['recommendations'][0]['name'], 'Neem Oil')
+
+
+@override_settings(LLM_RESPONSE_STORE={'ENABLED': False})
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_scrape_reports_llm_calls_fallbacks_and_view_latency(self):
+        reply = mock.Mock(text='not json', usage_metadata=mock.Mock(prompt_token_count=120, candidates_token_count=7))
+        model = mock.Mock(**{'generate_content.return_value': reply})
+        with mock.patch('core.utils.get_gemini_model', return_value=model), self.assertLogs('core.utils'):
+            get_pesticide_recommendations('okra', 'flowering')
+
+        self.client.get(reverse('login'))
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        response = self.client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('superagri_llm_request_seconds_count{function="generate_json",outcome="ok"}', body)
+        self.assertIn('superagri_llm_tokens_total{function="generate_json",direction="prompt"}', body)
+        self.assertIn('superagri_llm_fallbacks_total{default="get_default_pesticide_recommendations"}', body)
+        self.assertIn('superagri_cache_lookups_total{family="pesticide_rec",result="misses"}', body)
+        self.assertIn('superagri_request_seconds_bucket{view="login",method="GET",status="2xx",le="+Inf"}', body)
+
+    def test_scrape_is_refused_to_other_clients(self):
+        # Behind a local reverse proxy every client comes from 127.0.0.1
+        self.assertEqual(self.client.get(reverse('core:metrics'), REMOTE_ADDR='127.0.0.1').status_code, 404)
+        self.client.force_login(User.objects.create_user('farmer'))
+        self.assertEqual(self.client.get(reverse('core:metrics')).status_code, 404)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_scrape_with_the_metrics_token(self):
+        url = reverse('core:metrics')
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer s3cret'}).status_code, 200)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer wrong'}).status_code, 404)
+
+
+class ServerTimingTests(TestCase):
+    def test_header_breaks_down_sql_and_rendering(self):
+        user = User.objects.create_user('farmer')
+        Farm.objects.create(user=user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice')
+        self.client.force_login(user)
+        response = self.client.get(reverse('core:monitoring_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('render;dur=', timing)
+        self.assertRegex(timing, r'total;dur=[\d.]+$')
+
+    @override_settings(SLOW_REQUEST_LOG_MS=0)
+    def test_slow_requests_are_logged_as_json(self):
+        with self.assertLogs('core.timing', 'WARNING') as logs:
+            self.client.get(reverse('login'))
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry['event'], entry['view'], entry['status']), ('slow_request', 'login', 200))
+        self.assertEqual(entry['render_count'], 1)
+
+
+@override_settings(LLM_RESPONSE_STORE={'ENABLED': False})
+class FakeGeminiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_structured_replies_match_the_schema(self):
+        model = FakeGeminiModel(latency=0, jitter=0)
+        with installed(model):
+            self.assertEqual(len(generate_json('Plan okra', CROP_PLAN_SCHEMA)['phases']), 3)
+            generate_json('Pesticides for okra', PESTICIDE_SCHEMA)
+        self.assertEqual(model.calls, 2)
+
+    def test_failures_fall_back_to_the_default_plan(self):
+        model = FakeGeminiModel(latency=0, jitter=0, failure_rate=1)
+        with installed(model), self.assertLogs('core.utils', 'WARNING') as logs:
+            plan = generate_crop_plan('okra', '2026-06-01', 'loam', rules.LLM)
+        self.assertEqual(model.failures, 1)
+        self.assertIn('Error generating the crop plan', logs.output[0])
+        self.assertTrue(plan['phases'])
+
+
+@override_settings(GENERATION_USE_JOB_QUEUE=False, LLM_RESPONSE_STORE={'ENABLED': False})
+class InlineGenerationTests(TestCase):
+    """The async views generate in the request when the job queue is off"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('farmer')
+        cls.farm = Farm.objects.create(
+            user=cls.user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.model = FakeGeminiModel(latency=0, jitter=0)
+
+    def test_crop_plan(self):
+        planting_date = date.today() + timedelta(days=10)
+        with installed(self.model):
+            response = self.client.post(reverse('core:crop_plan'), {
+                'crop_name': 'Okra', 'planting_date': planting_date.isoformat(), 'mode': rules.LLM,
+            })
+        plan = CropPlan.objects.get(farm=self.farm)
+        self.assertRedirects(response, reverse('core:plan_detail', args=[plan.id]))
+        self.assertEqual(len(plan.daily_plan['phases']), 3)
+        self.assertEqual(self.model.calls, 1)
+        self.assertFalse(GenerationJob.objects.exists())
+
+    def test_generate_recommendations(self):
+        with installed(self.model):
+            response = self.client.get(reverse('core:generate_recommendations'), {'mode': rules.LLM})
+        self.assertRedirects(response, reverse('core:view_recommendations'))
+        recommendation = CropRecommendation.objects.get(farm=self.farm)
+        self.assertTrue(recommendation.analysis)
+        self.assertEqual(self.model.calls, 1)
+
+    def test_generate_pesticide_recommendations(self):
+        plan = CropPlan.objects.create(
+            farm=self.farm, crop_name='okra', planting_date=date.today(),
+            harvest_date=date.today() + timedelta(days=90), monitoring_frequency='weekly',
+        )
+        with installed(self.model):
+            response = self.client.get(reverse('core:generate_pesticide_recommendations', args=[plan.id]))
+        self.assertRedirects(response, reverse('core:plan_detail', args=[plan.id]), fetch_redirect_response=False)
+        plan.refresh_from_db()
+        self.assertEqual(len(plan.pesticides['recommendations']), 3)
+
+
+class GenerationJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('farmer')
+
+    def enqueue(self, **fields):
+        return GenerationJob.objects.create(user=self.user, kind='recommendation', payload={}, **fields)
+
+    def test_claims_are_exclusive_and_oldest_first(self):
+        first, second = self.enqueue(), self.enqueue()
+        self.assertEqual(jobs.claim_next_job().id, first.id)
+        self.assertEqual(jobs.claim_next_job().id, second.id)
+        self.assertIsNone(jobs.claim_next_job())
+        self.assertEqual(GenerationJob.objects.get(id=first.id).attempts, 1)
+
+    def test_failing_job_is_retried_up_to_max_attempts(self):
+        job = self.enqueue()
+        with mock.patch.dict(jobs.JOB_HANDLERS, recommendation=mock.Mock(side_effect=RuntimeError('boom'))):
+            for _ in range(jobs.MAX_ATTEMPTS):
+                jobs.run_job(jobs.claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), ('failed', jobs.MAX_ATTEMPTS, 'boom'))
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_stale_jobs_are_requeued_until_out_of_attempts(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        retry = self.enqueue(status='running', started_at=long_ago, attempts=1)
+        crashing = self.enqueue(status='running', started_at=long_ago, attempts=jobs.MAX_ATTEMPTS)
+        fresh = self.enqueue(status='running', started_at=timezone.now(), attempts=1)
+
+        self.assertEqual(jobs.requeue_stale_jobs(600), (1, 1))
+        statuses = dict(GenerationJob.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [statuses[retry.id], statuses[crashing.id], statuses[fresh.id]], ['pending', 'failed', 'running']
+        )
+
+    def test_result_of_a_taken_over_job_is_discarded(self):
+        self.enqueue()
+        job = jobs.claim_next_job()
+        # Re-queued as stale and claimed again while the first run was still going
+        GenerationJob.objects.filter(id=job.id).update(started_at=timezone.now() + timedelta(seconds=1))
+        with mock.patch.dict(jobs.JOB_HANDLERS, recommendation=mock.Mock(return_value={'recommendation_id': 1})):
+            jobs.run_job(job)
+        self.assertEqual(GenerationJob.objects.get(id=job.id).status, 'running')
+
+    def test_worker_drains_the_queue(self):
+        for _ in range(2):
+            self.enqueue()
+        handler = mock.Mock(return_value={'recommendation_id': 1})
+        with mock.patch.dict(jobs.JOB_HANDLERS, recommendation=handler):
+            call_command('run_generation_worker', '--once', stdout=mock.Mock())
+        self.assertEqual(handler.call_count, 2)
+        self.assertEqual(set(GenerationJob.objects.values_list('status', flat=True)), {'done'})
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def generate(self, value='ours', delay=0.2):
+        self.calls += 1
+        time.sleep(delay)
+        return {'plan': value}
+
+    def test_threads_share_one_generation(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: get_cached_or_generate('crop_plan:threads', self.generate), range(8)))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{'plan': 'ours'}] * 8)
+
+    def test_coroutines_share_one_generation(self):
+        async def generate():
+            self.calls += 1
+            await asyncio.sleep(0.1)
+            return {'plan': 'ours'}
+
+        async def requests():
+            return await asyncio.gather(*(aget_cached_or_generate('crop_plan:async', generate) for _ in range(8)))
+
+        self.assertEqual(asyncio.run(requests()), [{'plan': 'ours'}] * 8)
+        self.assertEqual(self.calls, 1)
+
+    @mock.patch('core.utils.SINGLE_FLIGHT_POLL_INTERVAL', 0.01)
+    def test_waits_for_another_process_holding_the_lock(self):
+        cache.add('lock_crop_plan:locked', 'other process', 60)
+        threading.Timer(0.1, cache.set, args=('crop_plan:locked', {'plan': 'theirs'})).start()
+        self.assertEqual(get_cached_or_generate('crop_plan:locked', self.generate), {'plan': 'theirs'})
+        self.assertEqual(self.calls, 0)
+
+    @mock.patch('core.utils.SINGLE_FLIGHT_POLL_INTERVAL', 0.01)
+    def test_generates_when_the_other_process_gives_up(self):
+        cache.add('lock_crop_plan:abandoned', 'other process', 60)
+        threading.Timer(0.1, cache.delete, args=('lock_crop_plan:abandoned',)).start()
+        self.assertEqual(get_cached_or_generate('crop_plan:abandoned', self.generate), {'plan': 'ours'})
+        self.assertEqual(self.calls, 1)
+
+    @mock.patch('core.utils.SINGLE_FLIGHT_POLL_INTERVAL', 0.01)
+    @mock.patch('core.utils.SINGLE_FLIGHT_LOCK_TIMEOUT', 0.2)
+    def test_followers_stop_waiting_for_a_stuck_leader(self):
+        release = threading.Event()
+
+        def stuck():
+            release.wait(5)
+            return {'plan': 'late'}
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            leader = pool.submit(get_cached_or_generate, 'crop_plan:stuck', stuck)
+            time.sleep(0.05)
+            started = time.monotonic()
+            result = get_cached_or_generate('crop_plan:stuck', lambda: self.generate(delay=0))
+            waited = time.monotonic() - started
+            release.set()
+            leader.result()
+        self.assertEqual(result, {'plan': 'ours'})
+        self.assertLess(waited, 2)
+
+
+@override_settings(LLM_RESPONSE_STORE={'ENABLED': True, 'MAX_ENTRIES': 2, 'TTL': 60, 'CULL_EVERY': 1000})
+class LLMStoreTests(TestCase):
+    def age(self, prompt, **delta):
+        """Move an entry's timestamps into the past"""
+        then = timezone.now() - timedelta(**delta)
+        LLMResponse.objects.filter(key=llm_store.make_key('model', prompt)).update(
+            created_at=then, last_accessed=then
+        )
+
+    def test_round_trip_normalizes_whitespace(self):
+        llm_store.put('model', 'Plan  okra\n', 'reply')
+        self.assertEqual(llm_store.get('model', 'Plan okra'), 'reply')
+        self.assertIsNone(llm_store.get('other model', 'Plan okra'))
+
+    def test_expired_entries_are_misses(self):
+        llm_store.put('model', 'Plan okra', 'reply')
+        self.age('Plan okra', seconds=61)
+        self.assertIsNone(llm_store.get('model', 'Plan okra'))
+
+    def test_rewriting_an_expired_entry_restarts_its_ttl(self):
+        llm_store.put('model', 'Plan okra', 'old reply')
+        self.age('Plan okra', seconds=61)
+        llm_store.put('model', 'Plan okra', 'new reply')
+        self.assertEqual(llm_store.get('model', 'Plan okra'), 'new reply')
+
+    def test_evict_drops_expired_then_least_recently_used(self):
+        for prompt in ('expired', 'old', 'used', 'new'):
+            llm_store.put('model', prompt, prompt)
+        self.age('expired', seconds=61)
+        self.age('old', seconds=30)
+        self.age('used', seconds=20)
+        llm_store.get('model', 'used')
+
+        self.assertEqual(llm_store.evict(), 2)
+        self.assertEqual(
+            set(LLMResponse.objects.values_list('response_text', flat=True)), {'used', 'new'}
+        )
+
+    def test_purge_removes_everything(self):
+        llm_store.put('model', 'Plan okra', 'reply')
+        llm_store.put('model', 'Plan rice', 'reply')
+        self.assertEqual(llm_store.purge(), 2)
+        self.assertFalse(LLMResponse.objects.exists())
+
+
+class RateLimitTests(TestCase):
+    rule = {'name': 'test', 'limit': 3, 'window': 100}
+
+    def hit(self, now):
+        return ratelimit.hit('client', self.rule, now=now)
+
+    def test_rejections_are_not_counted(self):
+        for now in (1000, 1001, 1002):
+            self.assertEqual(self.hit(now), (True, 0))
+        for now in (1010, 1011, 1050):
+            self.assertFalse(self.hit(now)[0])
+        self.assertEqual(RateLimitCounter.objects.get(key='test:client', window_start=1000).count, 3)
+
+    def test_retry_after_waits_for_the_sliding_window(self):
+        for now in (1000, 1001, 1002):
+            self.hit(now)
+        # Three requests in the previous window still weigh 3 * 0.995 at
+        # t=1100.5; one more fits once a third of them has slid out
+        self.assertEqual(self.hit(1010), (False, 124))
+        self.assertFalse(self.hit(1100.5)[0])
+        self.assertFalse(self.hit(1133)[0])
+        self.assertEqual(self.hit(1134), (True, 0))
+
+    def test_retry_after_within_the_window(self):
+        for now in (1000, 1001, 1002):
+            self.hit(now)
+        self.assertEqual(self.hit(1150), (True, 0))
+        # Estimate at 1160 with another request: 3 * 0.4 + 2 > 3; it fits
+        # once the previous window weighs at most 1, at 1167
+        allowed, retry_after = self.hit(1160)
+        self.assertEqual((allowed, retry_after), (False, 7))
+        self.assertFalse(self.hit(1166)[0])
+        self.assertTrue(self.hit(1160 + retry_after)[0])
+
+
+class DashboardCacheTests(TestCase):
+    def run_elsewhere(self, code):
+        """Run code in a separate Django process sharing this process's cache"""
+        env = {
+            **os.environ, 'DJANGO_SETTINGS_MODULE': 'smart_agri.settings', 'DJANGO_WARM_UP': '0',
+            'DJANGO_CACHE_DIR': settings.CACHES['default']['LOCATION'],
+        }
+        subprocess.run(
+            [sys.executable, '-c', f"import django; django.setup(); from core import dashboard; {code}"],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+
+    def test_another_process_invalidates_the_dashboard(self):
+        version = dashboard.get_version(4242)
+        dashboard.get_or_set(4242, version, 'tasks', lambda: ['stale'])
+        self.run_elsewhere("dashboard.bump_version(4242)")
+
+        new_version = dashboard.get_version(4242)
+        self.assertNotEqual(new_version, version)
+        self.assertEqual(dashboard.get_or_set(4242, new_version, 'tasks', lambda: ['fresh']), ['fresh'])
+
+    def test_another_process_forgets_the_farm(self):
+        user = User.objects.create_user('farmer')
+        first = Farm.objects.create(user=user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice')
+        self.assertEqual(dashboard.get_farm_id(user), first.id)
+
+        second = Farm.objects.create(user=user, location='Nellore', total_area=3, soil_type='clay', previous_crop='rice')
+        cache.set(dashboard._farm_key(user.pk), first.id)  # as if cached before the signal ran
+        self.run_elsewhere(f"dashboard.forget_farm({user.pk})")
+        self.assertEqual(dashboard.get_farm_id(user), second.id)
+
+
+@override_settings(LLM_RESPONSE_STORE={'ENABLED': True, 'MAX_ENTRIES': 100, 'TTL': 3600, 'CULL_EVERY': 1000})
+class WarmCacheTests(TransactionTestCase):
+    """Warming writes the store from worker threads, which need committed data"""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('farmer')
+        farm = Farm.objects.create(user=user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice')
+        for crop in ('Okra', 'Okra', 'okra ', 'Rice'):
+            CropPlan(farm=farm, crop_name=crop, planting_date=date.today(), harvest_date=date.today()).save()
+
+    def warm(self, model):
+        out = StringIO()
+        with installed(model):
+            call_command('warm_cache', '--top', '1', '--concurrency', '2', stdout=out)
+        return out.getvalue()
+
+    def test_warms_pesticides_for_the_most_planted_crops(self):
+        stages = len(knowledge_base.get().stages)
+        model = FakeGeminiModel(latency=0, jitter=0)
+        self.assertIn(f"{stages} generated", self.warm(model))
+        self.assertEqual(model.calls, stages)
+        self.assertEqual(LLMResponse.objects.count(), stages)
+
+        # Stored answers are skipped on the next run, even with a cold cache
+        cache.clear()
+        self.assertIn(f"{stages} already stored", self.warm(model))
+        self.assertEqual(model.calls, stages)
+
+    def test_dry_run_lists_the_top_crops(self):
+        out = StringIO()
+        call_command('warm_cache', '--top', '1', '--dry-run', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), len(knowledge_base.get().stages))
+        self.assertTrue(all(line.startswith('pesticides Okra ') and line.endswith('(3 plans)') for line in lines))
+
+
+class MonitoringTemplateRegistryTests(TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'templates.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.path))
+        self.now = 100.0
+        clock = mock.patch('core.monitoring.time.monotonic', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def write(self, templates, mtime):
+        with open(self.path, 'w') as f:
+            json.dump(templates, f)
+        os.utime(self.path, ns=(mtime, mtime))
+
+    def template(self, task_type):
+        return {'stages': [{'name': 'Growth', 'duration': 10, 'tasks': [
+            {'type': task_type, 'interval': 5, 'description': 'Check {crop}'},
+        ]}]}
+
+    def task_types(self, registry, crop='okra'):
+        return [task.task_type for task in registry.get(crop)]
+
+    def test_reloads_at_most_once_per_interval_when_the_file_changes(self):
+        self.write({'default': self.template('irrigation'), 'okra': self.template('pest_check')}, 10**18)
+        registry = MonitoringTemplateRegistry(self.path)
+        self.assertEqual(self.task_types(registry), ['pest_check'])
+        self.assertEqual(self.task_types(registry, 'rice'), ['irrigation'])
+
+        self.write({'default': self.template('irrigation'), 'okra': self.template('weeding')}, 2 * 10**18)
+        self.now += 0.5
+        self.assertEqual(self.task_types(registry), ['pest_check'])
+        self.now += 1
+        self.assertEqual(self.task_types(registry), ['weeding'])
+
+    def test_invalid_files_fall_back_to_the_built_in_template(self):
+        self.write({'okra': self.template('pest_check')}, 10**18)  # no default
+        with self.assertLogs('core.monitoring', 'WARNING') as logs:
+            registry = MonitoringTemplateRegistry(self.path)
+            self.assertEqual(self.task_types(registry), ['irrigation', 'pest_check'])
+        self.assertIn('Using built-in monitoring template', logs.output[0])
+
+        # A later broken edit keeps the templates already loaded
+        self.write({'default': self.template('weeding')}, 2 * 10**18)
+        self.now += 2
+        self.assertEqual(self.task_types(registry), ['weeding'])
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        os.utime(self.path, ns=(3 * 10**18, 3 * 10**18))
+        self.now += 2
+        with self.assertLogs('core.monitoring', 'WARNING') as logs:
+            self.assertEqual(self.task_types(registry), ['weeding'])
+        self.assertIn('Keeping previous monitoring templates', logs.output[0])
+
+
+@override_settings(LLM_RESPONSE_STORE={'ENABLED': False})
+class StreamRecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('farmer')
+        self.farm = Farm.objects.create(
+            user=self.user, location='Guntur', total_area=5, soil_type='loam', previous_crop='rice'
+        )
+
+    async def stream(self, mode):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('core:stream_recommendations'), {'mode': mode})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = ''.join([part.decode() async for part in response.streaming_content])
+        self.assertTrue(body.endswith('\n\n'))
+        events = []
+        for frame in body[:-2].split('\n\n'):
+            event, data = frame.split('\n')
+            self.assertTrue(event.startswith('event: ') and data.startswith('data: '))
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+        return events
+
+    async def test_gemini_reply_is_streamed_in_chunks_then_saved(self):
+        with installed(FakeGeminiModel(latency=0, jitter=0)), mock.patch('core.fake_gemini.TEXT_REPLY', REPORT):
+            events = await self.stream(rules.LLM)
+
+        names = [name for name, _ in events]
+        self.assertGreater(names.count('chunk'), 1)
+        self.assertEqual(names[-1], 'done')
+        self.assertEqual(events[-1][1], {'redirect_url': reverse('core:view_recommendations')})
+        text = ''.join(data for name, data in events if name == 'chunk')
+        self.assertEqual(text, REPORT)
+        recommendation = await CropRecommendation.objects.aget(farm=self.farm)
+        self.assertEqual(recommendation.water_analysis, 'Canal water from June')
+        self.assertEqual([crop.crop_name async for crop in recommendation.crops.all()], ['Chickpea', 'Maize'])
+
+    async def test_rules_report_is_sent_in_one_chunk(self):
+        with mock.patch('core.utils.get_gemini_model', side_effect=AssertionError('Gemini called')):
+            events = await self.stream(rules.RULES)
+
+        self.assertEqual([name for name, _ in events], ['chunk', 'done'])
+        self.assertTrue(events[0][1].startswith('Climate Analysis:'))
+        recommendation = await CropRecommendation.objects.aget(farm=self.farm)
+        self.assertEqual(await recommendation.crops.acount(), 4)
+
+
+class InlineExecutor(Executor):
+    """Runs each submitted call at once, so a batch test needs no worker threads"""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+@mock.patch('core.management.commands.generate_farm_batch.ThreadPoolExecutor', InlineExecutor)
+class FarmBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('farmer')
+        for i in range(5):
+            Farm.objects.create(user=user, location='Guntur', total_area=i + 1, soil_type='loam', previous_crop='rice')
+
+    def run_batch(self, generate):
+        out = StringIO()
+        with mock.patch('core.management.commands.generate_farm_batch.generate_recommendation_text', generate):
+            call_command(
+                'generate_farm_batch', '--all', '--crop', 'wheat', '--mode', 'rules',
+                '--concurrency', '1', '--batch-size', '1', stdout=out,
+            )
+        return out.getvalue()
+
+    def test_rerun_resumes_after_an_interrupted_batch(self):
+        calls = []
+
+        def interrupted(farm, mode):
+            calls.append(farm.id)
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return generate_recommendation_text(farm, mode)
+
+        self.assertIn('Interrupted; saving finished farms', self.run_batch(interrupted))
+        finished = set(CropRecommendation.objects.values_list('farm_id', flat=True))
+        self.assertTrue(2 <= len(finished) < 5)
+        self.assertEqual(set(CropPlan.objects.values_list('farm_id', flat=True)), finished)
+
+        rerun = mock.Mock(side_effect=generate_recommendation_text)
+        self.assertIn('5/5 farms, 0 failed', self.run_batch(rerun))
+        self.assertEqual(rerun.call_count, 5 - len(finished))
+        self.assertTrue(finished.isdisjoint(call.args[0].id for call in rerun.call_args_list))
+        self.assertEqual(CropRecommendation.objects.count(), 5)
+        self.assertEqual(CropPlan.objects.count(), 5)
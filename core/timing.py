@@ -0,0 +1,131 @@
+# core/timing.py
+"""
+Per-request timing breakdown, sent as a Server-Timing header.
+
+ServerTimingMiddleware starts a RequestTimings for each request and times
+every SQL query through connection.execute_wrapper. Gemini calls
+(metrics.llm_call), structured reply parsing (utils) and template
+rendering (TimedDjangoTemplates) add their time through phase() and
+record(), which find the current request through a context variable, so
+the hooks work from sync views, async views and the threads sync_to_async
+runs them in. Outside a request they cost one ContextVar lookup.
+
+Requests slower than settings.SLOW_REQUEST_LOG_MS are also logged as one
+JSON line, as a warning from the core.timing logger.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.deprecation import MiddlewareMixin
+
+# Header order, with the unit counted for each phase
+PHASES = {'db': 'queries', 'llm': 'calls', 'parse': 'replies', 'render': 'templates'}
+
+_current = ContextVar('request_timings', default=None)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(PHASES, 0)
+
+    def add(self, name, seconds):
+        self.seconds[name] += seconds
+        self.counts[name] += 1
+
+    def execute(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook timing each query"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - started)
+
+    def header(self, total):
+        parts = [
+            f'{name};dur={self.seconds[name] * 1000:.1f};desc="{self.counts[name]} {unit}"'
+            for name, unit in PHASES.items()
+            if self.counts[name]
+        ]
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def record(name, seconds):
+    """Add an already measured duration to the current request, if any"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def phase(name):
+    """Time the block as part of the current request's name phase"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with phase('render'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class ServerTimingMiddleware(MiddlewareMixin):
+    def process_request(self, request):
+        timings = RequestTimings()
+        _current.set(timings)
+        request._timings = timings
+        request._timings_db = connection.execute_wrapper(timings.execute)
+        request._timings_db.__enter__()
+
+    def process_response(self, request, response):
+        timings = getattr(request, '_timings', None)
+        if timings is None:
+            return response
+        request._timings_db.__exit__(None, None, None)
+        _current.set(None)
+
+        total = time.perf_counter() - timings.started
+        response['Server-Timing'] = timings.header(total)
+
+        slow_ms = settings.SLOW_REQUEST_LOG_MS
+        if slow_ms is not None and total * 1000 >= slow_ms:
+            match = getattr(request, 'resolver_match', None)
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match is not None else None,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                **{f'{name}_ms': round(seconds * 1000, 1) for name, seconds in timings.seconds.items()},
+                **{f'{name}_count': count for name, count in timings.counts.items()},
+            }))
+        return response
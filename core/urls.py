@@ -29,7 +29,15 @@ urlpatterns = [
     path('plan/<int:plan_id>/', views.plan_detail, name='plan_detail'),
     path('recommendations/', views.view_recommendations, name='view_recommendations'),
     path('recommendations/generate/', views.generate_recommendations, name='generate_recommendations'),
+    path('recommendations/stream/', views.stream_recommendations, name='stream_recommendations'),
     path('plan/<int:plan_id>/pesticides/', views.generate_pesticide_recommendations, name='generate_pesticide_recommendations'),
     path('monitoring/', views.monitoring_dashboard, name='monitoring_dashboard'),
     path('task/<int:task_id>/complete/', views.complete_task, name='complete_task'),
+    path('tasks/complete/', views.complete_tasks_batch, name='complete_tasks_batch'),
+    path('recurring-task/<int:recurrence_id>/<str:date>/complete/', views.complete_recurring_task,
+         name='complete_recurring_task'),
+    path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:job_id>/status/', views.job_status, name='job_status'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
+    path('metrics/', views.prometheus_metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -5,6 +5,17 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+The LLM-backed views (crop plan, recommendations, pesticide advice) are
+async and await Gemini without holding a thread, so serve the project
+through this entry point to keep ordinary pages responsive while those
+calls are in flight, e.g.:
+
+    uvicorn smart_agri.asgi:application --workers 2
+
+It is also the only entry point that sends /recommendations/stream/
+incrementally: under WSGI Django collects the async event stream before
+the response goes out, so the report arrives in one piece at the end.
 """
 
 import os
@@ -12,5 +23,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smart_agri.settings")
+os.environ.setdefault("DJANGO_WARM_UP", "1")
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.timing.ServerTimingMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,7 +57,7 @@ MIDDLEWARE = [
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,6 +73,9 @@ TEMPLATES = [
 
 ROOT_URLCONF = 'smart_agri.urls'
 WSGI_APPLICATION = 'smart_agri.wsgi.application'
+# Serve through smart_agri.asgi in production: the recommendation stream
+# (core.views.stream_recommendations) only reaches the browser as it is
+# generated under ASGI; WSGI buffers it until the report is complete.
 
 
 # Database
@@ -79,6 +85,12 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Web processes, generation workers and batch commands write
+        # concurrently; take the write lock up front and wait for it.
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
     }
 }
 
@@ -117,11 +129,80 @@ LOGIN_REDIRECT_URL = 'farm_details'
 LOGIN_URL = 'login'
 LOGOUT_REDIRECT_URL = 'login'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Shared by every process -- web workers and run_generation_worker -- so
+# cached Gemini answers, single-flight locks and dashboard versions bumped
+# in one process are seen by all of them. A per-process cache
+# (LocMemCache) would leave each worker with its own copy.
+#
+# Multi-process deployments should set DJANGO_REDIS_URL (needs the redis
+# package): Redis has atomic add/incr, so core.utils.get_cached_or_generate
+# makes one Gemini call per key across every process. Without it the file
+# cache is used. It is shared by the processes on this host, but its
+# add/incr check and then write, so one generation per key is only
+# guaranteed within a process. It also lists the cache directory on every
+# set to cull, so MAX_ENTRIES is kept small; answers pushed out of it are
+# still in the persistent LLM response store.
+REDIS_URL = os.environ.get('DJANGO_REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_DIR', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
     }
+
+# Runs the tests against a throwaway cache directory
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Run crop plan / recommendation / pesticide generation in background workers
+# (manage.py run_generation_worker) instead of inside the HTTP request.
+GENERATION_USE_JOB_QUEUE = True
+
+# Preload templates, data files and the Gemini client when the app starts
+# (core.startup) instead of on the first request. wsgi.py and asgi.py set
+# DJANGO_WARM_UP=1; manage.py commands and tests start without it.
+WARM_UP_ON_STARTUP = os.environ.get('DJANGO_WARM_UP') == '1'
+
+# Where plans and recommendations come from (core.rules): 'rules',
+# 'rules_then_llm' (Gemini only for inputs the rules can't cover) or 'llm'.
+# Views accept a per-request ?mode= override.
+GENERATION_MODE = 'rules_then_llm'
+# Crop score (0-100) the rules need for at least two crops to answer alone
+RULES_MIN_SCORE = 60
+
+# Per-route request budgets enforced by core.middleware.RateLimitMiddleware.
+# 'pattern' is a regex matched against the path; 'window' is in seconds.
+RATE_LIMITS = [
+    {'name': 'api', 'pattern': r'^/api/', 'limit': 100, 'window': 3600},
+    {'name': 'recommendations', 'pattern': r'^/recommendations/(generate|stream)/$',
+     'limit': 10, 'window': 3600},
+    {'name': 'crop_plan', 'pattern': r'^/crop-plan/$', 'methods': ['POST'],
+     'limit': 20, 'window': 3600},
+    {'name': 'pesticides', 'pattern': r'^/plan/\d+/pesticides/$', 'limit': 20, 'window': 3600},
+]
+
+# Requests slower than this (ms) are logged as one JSON line with their
+# Server-Timing breakdown (the core.timing logger); None disables the log
+SLOW_REQUEST_LOG_MS = 1000
+
+# Bearer token that lets a scraper read /metrics/ without a staff login
+# (core.metrics). Unset, only staff users can read it.
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN') or None
+
+# Persistent store for raw Gemini responses (core.llm_store), so a restart
+# doesn't mean paying for every prompt again. TTL is in seconds.
+LLM_RESPONSE_STORE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 5000,
+    'TTL': 60 * 60 * 24 * 30,
 }
 
 
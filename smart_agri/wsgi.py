@@ -12,5 +12,6 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smart_agri.settings")
+os.environ.setdefault("DJANGO_WARM_UP", "1")
 
 application = get_wsgi_application()